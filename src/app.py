@@ -13,7 +13,7 @@ logger = get_logger()
 
 # Add mapping for the output transaction match report columns
 # This mapping is used internally by TransactionMatcher for report generation
-EXPECTED_COLUMN_MAPPINGS['transaction_match_report'] = TransactionMatcher.TRANSACTION_REPORT_COLS_MAP
+EXPECTED_COLUMN_MAPPINGS['transaction_match_report'] = dict(TransactionMatcher.TRANSACTION_REPORT_COLS_MAP) # Plain dict copy: the mappings are logged with json.dumps
 
 class Application:
     VERSION = "1.0.0"
@@ -90,9 +90,15 @@ class ApplicationGUI(tk.Tk):
         logger.info("GUI initialized")
     
     def _check_for_updates(self):
-        """Check for available updates"""
+        """Check for available updates in the background so the window is not blocked on GitHub"""
+        try:
+            self.app.updater.async_check_for_updates(self._on_update_check_done, root=self)
+        except Exception as e:
+            logger.error(f"Error checking for updates: {e}")
+
+    def _on_update_check_done(self, update_info):
+        """Offer the update found by the background check; runs on the Tk main loop"""
         try:
-            update_info = self.app.check_for_updates()
             if update_info:
                 if messagebox.askyesno(
                     TranslationManager.get_translation(self.language.get(), "update_available"),
@@ -105,7 +111,7 @@ class ApplicationGUI(tk.Tk):
                 ):
                     self._download_and_install_update(update_info)
         except Exception as e:
-            logger.error(f"Error checking for updates: {e}")
+            logger.error(f"Error handling update check result: {e}")
 
     def _download_and_install_update(self, update_info):
         """Download and install the update"""
@@ -117,7 +123,9 @@ class ApplicationGUI(tk.Tk):
             
             update_file = self.app.updater.download_update(
                 update_info['url'],
-                update_info['version']
+                update_info['version'],
+                update_info.get('size'),
+                update_info.get('sha256')
             )
             
             if update_file:
@@ -1,5 +1,10 @@
 # Simplified main.py - now just an entry point that delegates to app.py
+import pandas as pd
+
 from app import main
 
 if __name__ == "__main__":
+    # Copy-on-write for the whole application: the cleaners' shallow copies share data until a column changes.
+    # Set here rather than on import of a library module, so importing utils never changes pandas semantics
+    pd.set_option("mode.copy_on_write", True)
     main()
\ No newline at end of file
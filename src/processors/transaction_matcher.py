@@ -1,16 +1,20 @@
 # src\processors\transaction_matcher.py
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Set, Optional, Callable
 import logging
 from pathlib import Path
 import time
-import itertools # Import for combinations
+from types import MappingProxyType
 
 from utils import get_logger, FileManager
 
 logger = get_logger()
 
+NS_PER_DAY = 86_400 * 10**9 # Dates are cached as int64 nanoseconds
+MISSING_CENTS = np.iinfo(np.int64).max // 4 # Stands in for NaN amounts; far outside any tolerance window
+
 class TransactionMatcher:
     """
     Class to match bank statement transactions with sales and purchase invoices.
@@ -23,6 +27,64 @@ class TransactionMatcher:
     5. Formats and saves the results in Thai with proper date formatting
     """
 
+    # Transaction match report columns: English names used internally, mapped to Thai in report generation
+    TRANSACTION_REPORT_COLS_MAP = MappingProxyType({
+        'original_statement_index': 'ลำดับเดิม Statement', # Added for reference
+        'transaction_type': 'ประเภทรายการ',
+        'transaction_date': 'วันที่ทำรายการ',
+        'withdrawal_amount': 'จำนวนเงินถอน', # Updated column
+        'deposit_amount': 'จำนวนเงินฝาก', # Updated column
+        'matched_companies': 'บริษัทที่จับคู่',
+        'sale_tax_ids': 'เลขประจำตัวผู้เสียภาษี (ขาย)',
+        'sale_invoice_numbers': 'เลขที่ใบกำกับภาษี (ขาย)',
+        'purchase_tax_ids': 'เลขประจำตัวผู้เสียภาษี (ซื้อ)',
+        'purchase_invoice_numbers': 'เลขที่ใบกำกับภาษี/เอกสาร (ซื้อ)',
+        'withholding_paid_dates': 'วันที่จ่าย (ภงด)',
+        'total_matched_amount': 'ยอดใบแจ้งหนี้ที่จับคู่รวม',
+        'difference': 'ส่วนต่าง',
+        'match_type': 'ประเภทการจับคู่', # Added for debugging/analysis
+    })
+
+    # Columns of each status report (English names, in report order)
+    STATUS_REPORT_COLS = {
+        'sale_tax_report': (
+            'order_number',
+            'date_of_sale_invoice',
+            'sale_invoice_tax_number',
+            'company_name',
+            'company_tax_id',
+            'product_value',
+            'vat',
+            'total_amount',
+            'withholding_tax',
+            'net_amount',
+            'matched',
+            'days_outstanding',
+        ),
+        'purchase_tax_report': (
+            'order_number',
+            'date_of_purchase_invoice',
+            'purchase_invoice_tax_number',
+            'purchase_invoice_id',
+            'company_name',
+            'company_tax_id',
+            'product_value',
+            'vat',
+            'total_amount',
+            'matched',
+        ),
+        'withholding_tax_report': (
+            'paid_date',
+            'company_name',
+            'tax_id',
+            'amount',
+            'withholding_tax',
+            'paid_amount',
+            'matched',
+            'days_since_payment',
+        ),
+    }
+
     def __init__(self,
                  statement_df: pd.DataFrame,
                  sale_df: pd.DataFrame,
@@ -58,11 +120,33 @@ class TransactionMatcher:
         self.sale_tolerance = sale_tolerance
         self.purchase_tolerance = purchase_tolerance
         self.column_mappings = expected_column_mappings or {} # Use empty dict if None
-
-        # Sets to keep track of matched invoices (to avoid reuse)
-        self.matched_sale_indexes: Set[int] = set()
-        self.matched_purchase_indexes: Set[int] = set()
-        self.matched_withholding_indexes: Set[int] = set()
+        self._thai_col_names: Dict[tuple, str] = {} # Cache for _get_thai_col_name
+
+        # Report column names in Thai, resolved once per matcher (also used for the empty reports)
+        self._txn_report_cols = {name: self._get_thai_col_name('transaction_match_report', name) for name in self.TRANSACTION_REPORT_COLS_MAP}
+        self._txn_report_thai_cols = list(self._txn_report_cols.values())
+        # English -> Thai names per status report, including the helper columns the builders add
+        self._report_names = {
+            report_type: {name: self._get_thai_col_name(report_type, name) for name in names + ('original_index',)}
+            for report_type, names in self.STATUS_REPORT_COLS.items()
+        }
+        self._sale_report_thai_cols = [self._report_names['sale_tax_report'][name] for name in self.STATUS_REPORT_COLS['sale_tax_report']]
+        self._purchase_report_thai_cols = [self._report_names['purchase_tax_report'][name] for name in self.STATUS_REPORT_COLS['purchase_tax_report']]
+        self._withholding_report_thai_cols = [self._report_names['withholding_tax_report'][name] for name in self.STATUS_REPORT_COLS['withholding_tax_report']]
+
+        # Bool masks aligned with dataframe position to keep track of matched invoices (to avoid reuse).
+        # The matched_*_indexes sets are derived from them; all three masks are written back
+        # to the dataframes' 'matched' columns once, after matching
+        self._sale_matched = np.zeros(len(self.sale_df), dtype=bool)
+        self._purchase_matched_mask = np.zeros(len(self.purchase_df), dtype=bool)
+        self._withholding_matched_mask = np.zeros(len(self.withholding_df), dtype=bool)
+
+        # Amount-bucket index over sale_df positions, built in _prepare_data
+        # Amounts are compared as int64 satang (cents) so tolerance checks are exact
+        self._sale_tol_cents = self._to_cents(sale_tolerance)
+        self._purchase_tol_cents = self._to_cents(purchase_tolerance)
+        self._sale_bucket_width = max(self._sale_tol_cents, 1)
+        self._sale_bucket_index: Dict[int, np.ndarray] = {}
 
         # Results for matched transactions
         self.matched_deposits: List[Dict] = []
@@ -74,11 +158,9 @@ class TransactionMatcher:
         self.unmatched_statement_entries = 0
         self.processed_entries = 0
 
-        # Keep original index to ensure reports maintain original order if needed before sorting
-        self.statement_df['original_index'] = self.statement_df.index
-        self.sale_df['original_index'] = self.sale_df.index
-        self.purchase_df['original_index'] = self.purchase_df.index
-        self.withholding_df['original_index'] = self.withholding_df.index
+        # Statement labels in chronological order; the dataframes keep their original index,
+        # which the reports use to refer back to the source rows
+        self._statement_order = self.statement_df.index.to_numpy()
 
 
         self.progress_callback = progress_callback
@@ -114,7 +196,9 @@ class TransactionMatcher:
             if df is not None and not df.empty and date_col in df.columns:
                 try:
                     # Attempt conversion, coercing errors to NaT (Not a Time)
-                    df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+                    # The cleaners already hand over datetime64 columns; only raw values need parsing
+                    if not pd.api.types.is_datetime64_any_dtype(df[date_col]):
+                        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
                     if df[date_col].isnull().any():
                          logger.warning(f"Found invalid date entries in {date_col} column of {df_name}_df after conversion.")
                     # logger.debug(f"Converted {date_col} in {df_name}_df to datetime")
@@ -157,38 +241,63 @@ class TransactionMatcher:
                         except Exception as e:
                             logger.error(f"Error converting '{col}' in {df_name}_df to string: {e}")
 
+        # Strip the identity columns once so the withholding confirmation can compare raw values
+        for df, cols in [(self.sale_df, ['company_name', 'company_tax_id']),
+                         (self.withholding_df, ['company_name', 'tax_id'])]:
+            for col in cols:
+                if col in df.columns:
+                    df[col] = df[col].astype(str).str.strip()
+
         # Add matched status columns if they don't exist
         if 'matched' not in self.sale_df.columns:
             self.sale_df['matched'] = False # Use boolean
         else: # Ensure it's boolean True/False
              self.sale_df['matched'] = self.sale_df['matched'].astype(str).str.lower() == 'true'
+        self._sale_matched = self.sale_df['matched'].to_numpy(dtype=bool).copy()
 
         if 'matched' not in self.purchase_df.columns:
             self.purchase_df['matched'] = False # Use boolean
         else: # Ensure it's boolean True/False
              self.purchase_df['matched'] = self.purchase_df['matched'].astype(str).str.lower() == 'true'
+        self._purchase_matched_mask = self.purchase_df['matched'].to_numpy(dtype=bool).copy()
 
         if 'matched' not in self.withholding_df.columns:
             self.withholding_df['matched'] = False # Use boolean
         else: # Ensure it's boolean True/False
              self.withholding_df['matched'] = self.withholding_df['matched'].astype(str).str.lower() == 'true'
+        self._withholding_matched_mask = self.withholding_df['matched'].to_numpy(dtype=bool).copy()
+        self._withholding_label_to_pos = {label: pos for pos, label in enumerate(self.withholding_df.index)}
 
 
         # Convert boolean isDeposit to actual boolean
         if 'isDeposit' in self.statement_df.columns:
             # Handle potential non-boolean string values like 'True', 'False', 'เงินฝาก', 'เงินถอน'
             # Assuming 'True' or 'เงินฝาก' means True
-            self.statement_df['isDeposit'] = self.statement_df['isDeposit'].astype(str).str.lower().apply(lambda x: x == 'true' or x == 'เงินฝาก')
+            self.statement_df['isDeposit'] = self.statement_df['isDeposit'].astype(str).str.lower().isin(['true', 'เงินฝาก'])
         else:
              logger.warning("Statement dataframe is missing 'isDeposit' column. Cannot proceed with matching.")
              self.statement_df = pd.DataFrame() # Clear statement_df if crucial column is missing
              return
 
 
-        # Sort bank statement by date
+        missing_statement_cols = [col for col in ['datetime', 'amount'] if col not in self.statement_df.columns]
+        if missing_statement_cols:
+             logger.error(f"Statement dataframe is missing required columns {missing_statement_cols}. Cannot proceed with matching.")
+             self.statement_df = pd.DataFrame()
+             return
+
+        # Order bank statement by date without re-indexing it
         if not self.statement_df.empty and 'datetime' in self.statement_df.columns:
-             self.statement_df = self.statement_df.sort_values(by='datetime').reset_index(drop=True) # Reset index after sort
+             self._statement_order = self.statement_df.sort_values(by='datetime', kind='mergesort').index.to_numpy()
 
+        # Statement columns in processing order, read positionally by the matchers
+        statement_sorted = self.statement_df.loc[self._statement_order]
+        self._stmt_dates = pd.DatetimeIndex(statement_sorted['datetime'])
+        self._stmt_amounts = statement_sorted['amount'].to_numpy(dtype=float)
+        self._stmt_is_deposit = statement_sorted['isDeposit'].to_numpy(dtype=bool)
+
+        self._build_array_caches()
+        self._build_sale_bucket_index()
 
         # Log info after preparation
         logger.debug(f"Prepared statement_df: {len(self.statement_df)} entries")
@@ -196,53 +305,147 @@ class TransactionMatcher:
         logger.debug(f"Prepared purchase_df: {len(self.purchase_df)} entries")
         logger.debug(f"Prepared withholding_df: {len(self.withholding_df)} entries")
 
-    def _find_candidate_sales(self,
-                              deposit_date: datetime,
-                              deposit_amount: float) -> pd.DataFrame:
+    @property
+    def matched_sale_indexes(self) -> Set[int]:
+        """Indices of sale invoices that have been matched, derived from the positional mask"""
+        return set(self.sale_df.index[self._sale_matched])
+
+    @property
+    def matched_purchase_indexes(self) -> Set[int]:
+        """Indices of purchase invoices that have been matched, derived from the positional mask"""
+        return set(self.purchase_df.index[self._purchase_matched_mask])
+
+    @property
+    def matched_withholding_indexes(self) -> Set[int]:
+        """Indices of withholding entries that have been matched, derived from the positional mask"""
+        return set(self.withholding_df.index[self._withholding_matched_mask])
+
+    def _mark_sale_matched(self, idx: int) -> None:
+        """Flag a sale invoice as used so it can't be matched again"""
+        self._sale_matched[self.sale_df.index.get_loc(idx)] = True
+
+    def _build_array_caches(self) -> None:
         """
-        Find candidate sale invoices for a deposit within date window and tolerance.
+        Validate the columns the matcher relies on and cache the date and amount columns used by the
+        candidate filters as contiguous 1-D arrays.
+        Dates are stored as int64 nanoseconds and amounts as int64 cents; NaT and NaN amounts never fall inside a window or tolerance.
+        A dataframe missing any required column gets all-NaT/NaN caches, so it simply yields no candidates.
+        The columns are kept separate rather than packed row-wise, since every filter scans a whole column at a time.
+        """
+        for attr, df, date_col, amount_col, other_cols in [
+            ('_sale', self.sale_df, 'date_of_sale_invoice', 'net_amount', ['company_name', 'company_tax_id', 'sale_invoice_tax_number']),
+            ('_purchase', self.purchase_df, 'date_of_purchase_invoice', 'total_amount', ['company_name', 'purchase_invoice_id']),
+            ('_withholding', self.withholding_df, 'paid_date', 'paid_amount', ['company_name', 'tax_id'])
+        ]:
+            missing_cols = [col for col in [date_col, amount_col] + other_cols if col not in df.columns]
+            if missing_cols and not df.empty:
+                logger.error(f"{attr.strip('_')}_df is missing required columns {missing_cols}. Its entries will not be matched.")
+
+            if missing_cols:
+                setattr(self, f"{attr}_dates_i8", np.full(len(df), np.iinfo(np.int64).min, dtype=np.int64))
+                setattr(self, f"{attr}_cents", np.full(len(df), MISSING_CENTS, dtype=np.int64))
+            else:
+                setattr(self, f"{attr}_dates_i8", np.ascontiguousarray(df[date_col].to_numpy(dtype='datetime64[ns]').view(np.int64)))
+                amounts = df[amount_col].to_numpy(dtype=float)
+                setattr(self, f"{attr}_cents", np.where(np.isnan(amounts), MISSING_CENTS, np.rint(np.nan_to_num(amounts) * 100)).astype(np.int64))
+
+        # Withholding entries are looked up by amount window, so keep an amount-sorted order as well (missing amounts sort last)
+        self._withholding_amount_order = np.argsort(self._withholding_cents, kind='stable')
+        self._withholding_cents_sorted = self._withholding_cents[self._withholding_amount_order]
+
+    @staticmethod
+    def _to_cents(amount: float) -> int:
+        """Convert a baht amount to whole satang (cents)"""
+        return int(round(amount * 100))
+
+    def _build_sale_bucket_index(self) -> None:
+        """
+        Bucket sale invoices by net_amount so single-sale lookups only touch nearby amounts.
+        Any invoice within sale_tolerance of a deposit falls in the deposit's bucket or one of its neighbours.
+        """
+        positions = np.flatnonzero(self._sale_cents != MISSING_CENTS)
+        buckets = self._sale_cents[positions] // self._sale_bucket_width
+        order = np.argsort(buckets, kind='stable')
+        bucket_keys, starts = np.unique(buckets[order], return_index=True)
+        self._sale_bucket_index = dict(zip(bucket_keys.tolist(), np.split(positions[order], starts[1:])))
+        logger.debug(f"Built sale amount index: {len(self._sale_bucket_index)} buckets")
+
+    def _find_single_sale_match(self,
+                                deposit_date: datetime,
+                                deposit_amount: float) -> Optional[int]:
+        """
+        Find the unmatched sale invoice closest in amount to a deposit, within date window and tolerance.
 
         Args:
             deposit_date: Date of the deposit
             deposit_amount: Amount of the deposit
 
         Returns:
-            DataFrame slice of candidate sale invoices (unmatched)
+            Index of the best sale invoice in sale_df, or None if nothing is within tolerance.
         """
-        try:
-            # Filter sales that aren't already matched
-            unmatched_sales = self.sale_df[~self.sale_df['matched']].copy()
-
-            if unmatched_sales.empty:
-                 return unmatched_sales # Return empty if no unmatched sales
-
-            # Filter by date range
-            # Invoice date should be within max_credit_days before or after deposit date
-            # Note: The requirement specifically said "Invoice date and paid date can differ, but they should not exceed a 30-day credit. The paid date can be either before or after the invoice date."
-            # This implies the _payment_ date (deposit_date) must be within 30 days of the invoice date.
-            # So, invoice_date must be between deposit_date - 30 days and deposit_date + 30 days.
-            date_filter = (unmatched_sales['date_of_sale_invoice'] >= (deposit_date - timedelta(days=self.max_credit_days))) & \
-                          (unmatched_sales['date_of_sale_invoice'] <= (deposit_date + timedelta(days=self.max_credit_days)))
+        if not self._sale_bucket_index or np.isnan(deposit_amount) or pd.isna(deposit_date):
+            return None
 
-            candidates = unmatched_sales[date_filter].copy()
+        deposit_cents = self._to_cents(deposit_amount)
+        bucket = deposit_cents // self._sale_bucket_width
+        parts = [self._sale_bucket_index[key] for key in (bucket - 1, bucket, bucket + 1) if key in self._sale_bucket_index]
+        if not parts:
+            return None
+        positions = np.sort(np.concatenate(parts)) # Keep sale_df order so ties go to the earliest row
+
+        net_cents = self._sale_cents[positions]
+        sale_dates = self._sale_dates_i8[positions]
+        deposit_ns = pd.Timestamp(deposit_date).value
+        window_ns = int(self.max_credit_days * NS_PER_DAY)
+        diffs = np.abs(net_cents - deposit_cents)
+        mask = ~self._sale_matched[positions] & (net_cents >= 0) & (diffs <= self._sale_tol_cents) & \
+               (sale_dates >= deposit_ns - window_ns) & (sale_dates <= deposit_ns + window_ns)
+        if not mask.any():
+            return None
 
-            if candidates.empty:
-                 return candidates
+        positions = positions[mask]
+        return self.sale_df.index[positions[np.argmin(diffs[mask])]]
 
-            # Filter by amount (initial rough filter)
-            # Amount must be somewhat close to deposit_amount or a fraction of it for combinations
-            # A simple check is if the amount is within a larger range, e.g., deposit_amount * 2 or within deposit_amount + tolerance.
-            # Let's refine the amount check: filter candidates whose net_amount is within a reasonable range, say 0 to deposit_amount + sale_tolerance.
-            # This allows for single matches or invoices that are part of a combination summing up to the deposit amount.
-            amount_filter = (candidates['net_amount'] >= 0) & (candidates['net_amount'] <= (deposit_amount + self.sale_tolerance))
+    def _find_candidate_sales(self,
+                              deposit_date: datetime,
+                              deposit_amount: float) -> pd.DataFrame:
+        """
+        Find candidate sale invoices for a deposit within date window and tolerance.
 
-            candidates = candidates[amount_filter].copy()
+        Args:
+            deposit_date: Date of the deposit
+            deposit_amount: Amount of the deposit
 
-            # logger.debug(f"Found {len(candidates)} sales candidates for deposit {deposit_amount}")
-            return candidates
-        except Exception as e:
-            logger.error(f"Exception: {e}")
-            return pd.DataFrame()
+        Returns:
+            DataFrame slice of candidate sale invoices (unmatched)
+        """
+        # Compose all filters into a single boolean mask over the cached sale arrays so only one
+        # selection (and no intermediate copies) is made per deposit.
+        if pd.isna(deposit_date) or np.isnan(deposit_amount):
+            return self.sale_df.iloc[:0]
+        sale_dates = self._sale_dates_i8
+        net_cents = self._sale_cents
+        deposit_cents = self._to_cents(deposit_amount)
+        deposit_ns = pd.Timestamp(deposit_date).value
+        window_ns = int(self.max_credit_days * NS_PER_DAY)
+
+        # Filter by date range
+        # Invoice date should be within max_credit_days before or after deposit date
+        # Note: The requirement specifically said "Invoice date and paid date can differ, but they should not exceed a 30-day credit. The paid date can be either before or after the invoice date."
+        # This implies the _payment_ date (deposit_date) must be within 30 days of the invoice date.
+        # So, invoice_date must be between deposit_date - 30 days and deposit_date + 30 days.
+        date_mask = (sale_dates >= deposit_ns - window_ns) & (sale_dates <= deposit_ns + window_ns)
+
+        # Filter by amount (initial rough filter)
+        # Amount must be somewhat close to deposit_amount or a fraction of it for combinations
+        # Keep candidates whose net_amount is within 0 to deposit_amount + sale_tolerance.
+        # This allows for single matches or invoices that are part of a combination summing up to the deposit amount.
+        amount_mask = (net_cents >= 0) & (net_cents <= (deposit_cents + self._sale_tol_cents))
+
+        mask = ~self._sale_matched & date_mask & amount_mask
+
+        # logger.debug(f"Found {mask.sum()} sales candidates for deposit {deposit_amount}")
+        return self.sale_df[mask]
 
     def _find_candidate_withholdings(self,
                                      deposit_date: datetime,
@@ -257,36 +460,28 @@ class TransactionMatcher:
         Returns:
             DataFrame slice of candidate withholding tax entries (unmatched)
         """
-        try:
-            # Filter withholdings that aren't already matched
-            unmatched_withholdings = self.withholding_df[~self.withholding_df['matched']].copy()
+        if pd.isna(deposit_date) or np.isnan(deposit_amount):
+            return self.withholding_df.iloc[:0]
+        deposit_ns = pd.Timestamp(deposit_date).value
 
-            if unmatched_withholdings.empty:
-                return unmatched_withholdings
+        # Filter by amount (within tolerance) with a binary search over the amount-sorted entries
+        deposit_cents = self._to_cents(deposit_amount)
+        lo = np.searchsorted(self._withholding_cents_sorted, deposit_cents - self._sale_tol_cents, side='left')
+        hi = np.searchsorted(self._withholding_cents_sorted, deposit_cents + self._sale_tol_cents, side='right')
+        positions = np.sort(self._withholding_amount_order[lo:hi]) # Back to withholding_df order
 
-            # Filter by date - stricter date match requested (within 3 days)(+ or - days)
-            date_filter = (unmatched_withholdings['paid_date'] >= (deposit_date - timedelta(days=3))) & \
-                          (unmatched_withholdings['paid_date'] <= (deposit_date + timedelta(days=3)))
+        # Filter by date - stricter date match requested (within 3 days)(+ or - days)
+        paid_dates = self._withholding_dates_i8[positions]
+        date_mask = (paid_dates >= deposit_ns - 3 * NS_PER_DAY) & (paid_dates <= deposit_ns + 3 * NS_PER_DAY)
 
-            candidates = unmatched_withholdings[date_filter].copy()
+        mask = ~self._withholding_matched_mask[positions] & date_mask
 
-            if candidates.empty:
-                return candidates
-
-            # Filter by amount (within tolerance)
-            amount_filter = abs(candidates['paid_amount'] - deposit_amount) <= self.sale_tolerance
-
-            candidates = candidates[amount_filter].copy()
-
-            # logger.debug(f"Found {len(candidates)} withholding candidates for deposit {deposit_amount}")
-            return candidates
-        except Exception as e:
-            logger.error(f"Exception in finding candidate withholdings: {e}")
-            return pd.DataFrame()
+        # logger.debug(f"Found {mask.sum()} withholding candidates for deposit {deposit_amount}")
+        return self.withholding_df.iloc[positions[mask]]
 
     def _find_candidate_purchases(self,
                                  withdrawal_date: datetime,
-                                 withdrawal_amount: float) -> pd.DataFrame:
+                                 withdrawal_amount: float) -> np.ndarray:
         """
         Find candidate purchase invoices for a withdrawal within date window and tolerance.
 
@@ -295,34 +490,25 @@ class TransactionMatcher:
             withdrawal_amount: Amount of the withdrawal
 
         Returns:
-            List of indices of candidate purchase invoices
+            Positions (into purchase_df) of candidate purchase invoices (unmatched)
         """
-        try:
-            # Filter purchases that aren't already matched
-            unmatched_purchases = self.purchase_df[~self.purchase_df['matched']].copy()
-
-            if unmatched_purchases.empty:
-                return unmatched_purchases
-
-            # Filter by date range (withdrawal_date >= invoice_date and diff <= max_credit_days)
-            date_filter = (unmatched_purchases['date_of_purchase_invoice'] <= withdrawal_date) & \
-                          ((withdrawal_date - unmatched_purchases['date_of_purchase_invoice']).dt.days <= self.max_credit_days)
-
-            candidates = unmatched_purchases[date_filter].copy()
+        if pd.isna(withdrawal_date) or np.isnan(withdrawal_amount):
+            return np.empty(0, dtype=np.intp)
+        purchase_dates = self._purchase_dates_i8
+        withdrawal_ns = pd.Timestamp(withdrawal_date).value
 
-            if candidates.empty:
-                return candidates
+        # Filter by date range (withdrawal_date >= invoice_date and diff <= max_credit_days)
+        # Whole days are counted, so the difference only has to stay below max_credit_days + 1 days
+        date_mask = (purchase_dates <= withdrawal_ns) & \
+                    (purchase_dates > withdrawal_ns - int((self.max_credit_days + 1) * NS_PER_DAY))
 
-            # Filter by amount (within tolerance)
-            amount_filter = abs(candidates['total_amount'] - withdrawal_amount) <= self.purchase_tolerance
+        # Filter by amount (within tolerance)
+        amount_mask = np.abs(self._purchase_cents - self._to_cents(withdrawal_amount)) <= self._purchase_tol_cents
 
-            candidates = candidates[amount_filter].copy()
+        mask = ~self._purchase_matched_mask & date_mask & amount_mask
 
-            # logger.debug(f"Found {len(candidates)} purchase candidates for withdrawal {withdrawal_amount}")
-            return candidates
-        except Exception as e:
-            logger.error(f"Exception in finding candidate purchases: {e}")
-            return pd.DataFrame()
+        # logger.debug(f"Found {mask.sum()} purchase candidates for withdrawal {withdrawal_amount}")
+        return np.flatnonzero(mask)
 
     def _find_sale_combinations(self,
                                company_sales_candidates: pd.DataFrame,
@@ -338,263 +524,268 @@ class TransactionMatcher:
         Returns:
             List of indices of sale invoices that sum to deposit amount, or None if no combination found.
         """
-        try:
-            if company_sales_candidates.empty:
-                return None
-
-            # Sort candidates by net_amount descending? Or ascending? Descending might find larger invoices first.
-            # Let's try sorting by date descending to find recent invoices first.
-            company_sales_candidates = company_sales_candidates.sort_values(by='date_of_sale_invoice', ascending=False).copy()
-
-            # Try combinations up to size 3 (a practical limit)
-            for combo_size in range(1, min(4, len(company_sales_candidates) + 1)):
-                for indices in itertools.combinations(company_sales_candidates.index, combo_size):
-                    current_combination_sales = company_sales_candidates.loc[list(indices)]
-                    total_amount = current_combination_sales['net_amount'].sum()
-
-                    if abs(total_amount - deposit_amount) <= self.sale_tolerance:
-                        logger.debug(f"  - Found combination match (size {combo_size}) for deposit {deposit_amount}: Indices {list(indices)}, Sum {total_amount:.2f}")
-                        return list(indices) # Return the indices of the matched combination
-
-            return None # No combination found within the tolerance and size limit
-        except Exception as e:
-            logger.error(f"Exception: {e}")
+        if company_sales_candidates.empty:
             return None
 
-    def _match_deposit(self, statement_idx: int) -> Dict:
+        # Sort candidates by net_amount descending? Or ascending? Descending might find larger invoices first.
+        # Let's try sorting by date descending to find recent invoices first.
+        # Ordered with argsort on the cached dates rather than sorting the DataFrame slice
+        # (candidates are inside the date window, so there are no NaT sentinels to negate).
+        # The sort is stable, so invoices on the same date are tried in sale_df order; sort_values' default
+        # quicksort left that order unspecified, so combination picks among same-date invoices can differ from it
+        positions = self.sale_df.index.get_indexer(company_sales_candidates.index)
+        positions = positions[np.argsort(-self._sale_dates_i8[positions], kind='stable')]
+        candidate_indices = self.sale_df.index[positions]
+        cents = self._sale_cents[positions]
+        target = self._to_cents(deposit_amount)
+        tol = self._sale_tol_cents
+        n = len(cents)
+
+        # Single invoices were already tried by the single-sale match, so start at pairs.
+        # Scanning the upper triangle in row-major order finds the same first pair (and triple)
+        # that itertools.combinations would, without summing a DataFrame slice per tuple.
+        if n >= 2:
+            pair_hits = np.flatnonzero(np.triu(np.abs(cents[:, None] + cents[None, :] - target) <= tol, k=1))
+            if pair_hits.size:
+                i, j = divmod(int(pair_hits[0]), n)
+                indices = [candidate_indices[i], candidate_indices[j]]
+                logger.debug(f"  - Found combination match (size 2) for deposit {deposit_amount}: Indices {indices}, Sum {(cents[i] + cents[j]) / 100:.2f}")
+                return indices
+
+        # Try combinations up to size 3 (a practical limit)
+        for i in range(n - 2):
+            rest = cents[i + 1:]
+            triple_hits = np.flatnonzero(np.triu(np.abs(cents[i] + rest[:, None] + rest[None, :] - target) <= tol, k=1))
+            if triple_hits.size:
+                j, k = divmod(int(triple_hits[0]), len(rest))
+                j, k = i + 1 + j, i + 1 + k
+                indices = [candidate_indices[i], candidate_indices[j], candidate_indices[k]]
+                logger.debug(f"  - Found combination match (size 3) for deposit {deposit_amount}: Indices {indices}, Sum {(cents[i] + cents[j] + cents[k]) / 100:.2f}")
+                return indices
+
+        return None # No combination found within the tolerance and size limit
+
+    def _match_deposit(self, pos: int) -> Dict:
         """
         Match a deposit with sale invoices and/or withholding entries.
 
         Args:
-            statement_idx: Index of the deposit in statement_df
+            pos: Position of the deposit in the date-sorted statement (see _statement_order)
 
         Returns:
             Dictionary with matching information
         """
-        try:
-            deposit_row = self.statement_df.loc[statement_idx] # Use .loc as index might not be 0-based after sort
-            deposit_date = deposit_row['datetime']
-            deposit_amount = float(deposit_row['amount']) # Ensure float
-
-            matched_info = {
-                'statement_idx': statement_idx,
-                'deposit_date': deposit_date,
-                'deposit_amount': deposit_amount,
-                'matched_sales_indices': [], # Store indices
-                'matched_withholdings_indices': [], # Store indices
-                'companies': set(),
-                'total_matched_amount': 0.0,
-                'difference': deposit_amount,  # Initialize with full amount
-                'is_matched': False,
-                'match_type': 'None' # 'Sale', 'Withholding', 'Sale+Withholding', 'Combination Sale'
-            }
-
-            logger.debug(f"Attempting to match deposit: statement_idx={statement_idx}, Date={deposit_date.strftime('%y-%m-%d')}, Amount={deposit_amount:.2f}")
-
-            # --- Strategy: Prioritize matches ---
-            # 1. Look for single exact/tolerance match in Sales
-            # 2. Look for combination match in Sales (same company)
-            # 3. Look for single exact/tolerance match in Withholding (as a fallback if sales are missing or don't match)
-
-            candidate_sales = self._find_candidate_sales(deposit_date, deposit_amount)
-
-            # Filter sales candidates by company to prepare for combination matching
-            sales_candidates_by_company = {}
-            if not candidate_sales.empty:
-                for company_name, group in candidate_sales.groupby('company_name'):
-                    sales_candidates_by_company[company_name] = group.copy() # Use copy to avoid SettingWithCopyWarning
-
-            # --- Attempt 1: Single Sale Match ---
-            single_sale_match_found = False
-            if not candidate_sales.empty:
-                for idx, sale_row in candidate_sales.iterrows():
-                    sale_amount = float(sale_row['net_amount'])
-                    if abs(sale_amount - deposit_amount) <= self.sale_tolerance:
-                        # Found a potential single sale match
-                        if idx not in self.matched_sale_indexes: # Ensure it's not already matched elsewhere
-                            self.matched_sale_indexes.add(idx)
-                            self.sale_df.loc[idx, 'matched'] = True # Use .loc for index assignment
-
-                            matched_info['matched_sales_indices'].append(idx)
-                            matched_info['companies'].add(str(sale_row['company_name']))
-                            matched_info['total_matched_amount'] = sale_amount
-                            matched_info['difference'] = deposit_amount - sale_amount
-                            matched_info['is_matched'] = True
-                            matched_info['match_type'] = 'Sale (Single)'
-
-                            logger.debug(f"  - Found single sale match: Index={idx}, Invoice='{sale_row['sale_invoice_tax_number']}', Amount={sale_amount:.2f}")
-                            single_sale_match_found = True
-                            break # Stop after finding the first single match
-
-            # --- Attempt 2: Sale Combination Match (if no single match found) ---
-            if not single_sale_match_found and not candidate_sales.empty:
-                for company_name, company_candidates in sales_candidates_by_company.items():
-                    # Filter out candidates already matched in the single-match attempt (shouldn't happen with the check above, but good practice)
-                    eligible_company_candidates = company_candidates[~company_candidates.index.isin(self.matched_sale_indexes)].copy()
-
-                    matched_indices = self._find_sale_combinations(eligible_company_candidates, deposit_amount)
-
-                    if matched_indices:
-                        # Found a combination match
-                        total_amount = 0.0
-                        for idx in matched_indices:
-                             if idx not in self.matched_sale_indexes: # Double check, though _find_sale_combinations should use eligible ones
-                                self.matched_sale_indexes.add(idx)
-                                self.sale_df.loc[idx, 'matched'] = True # Use .loc
-                                matched_info['matched_sales_indices'].append(idx)
-                                total_amount += float(self.sale_df.loc[idx, 'net_amount'])
-
-                        matched_info['companies'].add(str(company_name))
-                        matched_info['total_matched_amount'] = total_amount
-                        matched_info['difference'] = deposit_amount - total_amount
-                        matched_info['is_matched'] = True
-                        matched_info['match_type'] = 'Sale (Combination)'
-
-                        logger.debug(f"  - Found combination sale match for company '{company_name}': Indices={matched_info['matched_sales_indices']}, Sum={matched_info['total_matched_amount']:.2f}")
-                        break # Stop after finding the first combination match for any company
-
-            # --- Attempt 3: Withholding Match (as a fallback or confirmation) ---
-            # If a Sale match (single or combination) was found, try to find a *confirming* withholding match from the same company.
-            # If *no* Sale match was found, try to match against Withholding *directly* as a fallback.
-
-            candidate_withholdings = self._find_candidate_withholdings(deposit_date, deposit_amount)
-
-            if not candidate_withholdings.empty:
-                 for with_idx, with_row in candidate_withholdings.iterrows():
-                     if with_idx in self.matched_withholding_indexes: # Ensure not already matched
-                         continue
-
-                     with_amount = float(with_row['paid_amount'])
-
-                     # Check if it's a potential match (within tolerance, already filtered by date)
-                     if abs(with_amount - deposit_amount) <= self.sale_tolerance:
-                         # This withholding entry is a candidate
-
-                         if matched_info['is_matched']:
-                             # A Sale match was already found. Is this withholding entry from one of the matched companies?
-                             with_company = str(with_row['company_name']).strip()
-                             with_tax_id = str(with_row['tax_id']).strip()
-
-                             # Check if the withholding company/tax ID matches any of the matched sales' company/tax ID
-                             company_match_found = False
-                             for sale_idx in matched_info['matched_sales_indices']:
-                                 sale_row = self.sale_df.loc[sale_idx]
-                                 sale_company = str(sale_row['company_name']).strip()
-                                 sale_tax_id = str(sale_row['company_tax_id']).strip()
-                                 # Allow matching either by name or tax ID
-                                 if (with_company and with_company == sale_company) or \
-                                    (with_tax_id and with_tax_id == sale_tax_id):
-                                     company_match_found = True
-                                     break # Found a matching company for this withholding
-
-                             if company_match_found:
-                                # Found a confirming withholding match
-                                self.matched_withholding_indexes.add(with_idx)
-                                self.withholding_df.loc[with_idx, 'matched'] = True # Use .loc
-                                matched_info['matched_withholdings_indices'].append(with_idx)
-                                # Add company if not already added (e.g., from sale)
-                                if with_company:
-                                     matched_info['companies'].add(with_company)
-                                # No need to update total_matched_amount or difference if a sale match was primary
-                                matched_info['match_type'] = matched_info.get('match_type', 'Sale') + '+Withholding' # Indicate confirmation
-                                logger.debug(f"  - Found confirming withholding match: Index={with_idx}, Company='{with_row['company_name']}', Amount={with_amount:.2f}")
-                                # Keep looking for other confirming withholdings if multiple sales were matched?
-                                # For simplicity, let's just take the first confirming withholding for now.
-                                break
-
-                         else:
-                             # No Sale match was found. This withholding entry is a potential *fallback* match.
-                             # Treat this as the primary match if it's within tolerance and date range (already filtered)
-                             self.matched_withholding_indexes.add(with_idx)
-                             self.withholding_df.loc[with_idx, 'matched'] = True # Use .loc
-
-                             matched_info['matched_withholdings_indices'].append(with_idx)
-                             matched_info['companies'].add(str(with_row['company_name']))
-                             matched_info['total_matched_amount'] = with_amount
-                             matched_info['difference'] = deposit_amount - with_amount
-                             matched_info['is_matched'] = True
-                             matched_info['match_type'] = 'Withholding (Fallback)'
-
-                             logger.debug(f"  - Found fallback withholding match: Index={with_idx}, Company='{with_row['company_name']}', Amount={with_amount:.2f}")
-                             # If we match via withholding fallback, we stop looking for sales for this deposit
-                             return matched_info # Return immediately after fallback match
-
-            # Final check if any match was found
-            if not matched_info['is_matched']:
-                 logger.debug(f"  - No match found for deposit on {deposit_date.strftime('%y-%m-%d')} for amount {deposit_amount:.2f}")
-            else:
-                 logger.debug(f"  - Deposit matched: Type='{matched_info['match_type']}', Matched Amount={matched_info['total_matched_amount']:.2f}, Diff={matched_info['difference']:.2f}")
+        statement_idx = self._statement_order[pos]
+        deposit_date = self._stmt_dates[pos]
+        deposit_amount = float(self._stmt_amounts[pos]) # Ensure float
 
+        matched_info = {
+            'statement_idx': statement_idx,
+            'deposit_date': deposit_date,
+            'deposit_amount': deposit_amount,
+            'matched_sales_indices': [], # Store indices
+            'matched_withholdings_indices': [], # Store indices
+            'companies': [], # Deduplicated when the report joins them
+            'total_matched_amount': 0.0,
+            'difference': deposit_amount,  # Initialize with full amount
+            'is_matched': False,
+            'match_type': 'None' # 'Sale', 'Withholding', 'Sale+Withholding', 'Combination Sale'
+        }
+
+        if pd.isna(deposit_date):
+            # Without a date nothing can fall inside the credit window; report it as an error entry
+            logger.warning(f"Deposit at statement_idx={statement_idx} has no date, skipping it")
+            matched_info.update(difference=0.0, match_type='Error')
             return matched_info
-        except Exception as e:
-            logger.error(f"Exception in matching deposit: {e}")
-            return {
-                'statement_idx': statement_idx,
-                'deposit_date': None,
-                'deposit_amount': None,
-                'matched_sales_indices': [],
-                'matched_withholdings_indices': [],
-                'companies': set(),
-                'total_matched_amount': 0.0,
-                'difference': 0.0,
-                'is_matched': False,
-                'match_type': 'Error'
-            }
-
-    def _match_withdrawal(self, statement_idx: int) -> Dict:
+
+        logger.debug(f"Attempting to match deposit: statement_idx={statement_idx}, Date={deposit_date.strftime('%y-%m-%d')}, Amount={deposit_amount:.2f}")
+
+        # --- Strategy: Prioritize matches ---
+        # 1. Look for single exact/tolerance match in Sales
+        # 2. Look for combination match in Sales (same company)
+        # 3. Look for single exact/tolerance match in Withholding (as a fallback if sales are missing or don't match)
+
+        # --- Attempt 1: Single Sale Match ---
+        # Take the candidate with the smallest amount difference within tolerance rather than
+        # the first tolerant one, so a deposit doesn't consume an invoice that fits it only
+        # loosely while a closer one is available.
+        single_sale_match_found = False
+        idx = self._find_single_sale_match(deposit_date, deposit_amount)
+        if idx is not None:
+            sale_row = self.sale_df.loc[idx]
+            sale_amount = float(sale_row['net_amount'])
+
+            self._mark_sale_matched(idx)
+
+            matched_info['matched_sales_indices'].append(idx)
+            matched_info['companies'].append(str(sale_row['company_name']))
+            matched_info['total_matched_amount'] = sale_amount
+            matched_info['difference'] = deposit_amount - sale_amount
+            matched_info['is_matched'] = True
+            matched_info['match_type'] = 'Sale (Single)'
+
+            logger.debug(f"  - Found single sale match: Index={idx}, Invoice='{sale_row['sale_invoice_tax_number']}', Amount={sale_amount:.2f}")
+            single_sale_match_found = True
+
+        # The full date-windowed candidate scan is only needed for combinations
+        candidate_sales = self._find_candidate_sales(deposit_date, deposit_amount) if not single_sale_match_found else pd.DataFrame()
+
+        # Filter sales candidates by company to prepare for combination matching
+        sales_candidates_by_company = {}
+        if not candidate_sales.empty:
+            for company_name, group in candidate_sales.groupby('company_name'):
+                sales_candidates_by_company[company_name] = group.copy() # Use copy to avoid SettingWithCopyWarning
+
+        # --- Attempt 2: Sale Combination Match (if no single match found) ---
+        if not single_sale_match_found and not candidate_sales.empty:
+            for company_name, company_candidates in sales_candidates_by_company.items():
+                # Filter out candidates already matched in the single-match attempt (shouldn't happen with the check above, but good practice)
+                company_positions = self.sale_df.index.get_indexer(company_candidates.index)
+                eligible_company_candidates = company_candidates[~self._sale_matched[company_positions]]
+
+                matched_indices = self._find_sale_combinations(eligible_company_candidates, deposit_amount)
+
+                if matched_indices:
+                    # Found a combination match
+                    total_amount = 0.0
+                    for idx in matched_indices: # Only eligible (unmatched) candidates were searched
+                        self._mark_sale_matched(idx)
+                        matched_info['matched_sales_indices'].append(idx)
+                        total_amount += float(self.sale_df.loc[idx, 'net_amount'])
+
+                    matched_info['companies'].append(str(company_name))
+                    matched_info['total_matched_amount'] = total_amount
+                    matched_info['difference'] = deposit_amount - total_amount
+                    matched_info['is_matched'] = True
+                    matched_info['match_type'] = 'Sale (Combination)'
+
+                    logger.debug(f"  - Found combination sale match for company '{company_name}': Indices={matched_info['matched_sales_indices']}, Sum={matched_info['total_matched_amount']:.2f}")
+                    break # Stop after finding the first combination match for any company
+
+        # --- Attempt 3: Withholding Match (as a fallback or confirmation) ---
+        # If a Sale match (single or combination) was found, try to find a *confirming* withholding match from the same company.
+        # If *no* Sale match was found, try to match against Withholding *directly* as a fallback.
+
+        candidate_withholdings = self._find_candidate_withholdings(deposit_date, deposit_amount)
+
+        if not candidate_withholdings.empty:
+             # Iterate plain column arrays rather than iterrows() to avoid building a Series per row
+             for with_idx, with_amount, with_company_name, with_tax_id in zip(candidate_withholdings.index.values,
+                                                                                candidate_withholdings['paid_amount'].values,
+                                                                                candidate_withholdings['company_name'].values,
+                                                                                candidate_withholdings['tax_id'].values):
+                 with_pos = self._withholding_label_to_pos[with_idx]
+                 if self._withholding_matched_mask[with_pos]: # Ensure not already matched
+                     continue
+
+                 with_amount = float(with_amount)
+
+                 # Candidates are already within tolerance (compared in cents) and inside the date window
+                 if matched_info['is_matched']:
+                     # A Sale match was already found. Is this withholding entry from one of the matched companies?
+                     with_company = with_company_name # Already stripped in _prepare_data
+
+                     # Check if the withholding company/tax ID matches any of the matched sales' company/tax ID
+                     company_match_found = False
+                     for sale_idx in matched_info['matched_sales_indices']:
+                         sale_company = self.sale_df.at[sale_idx, 'company_name']
+                         sale_tax_id = self.sale_df.at[sale_idx, 'company_tax_id']
+                         # Allow matching either by name or tax ID
+                         if (with_company and with_company == sale_company) or \
+                            (with_tax_id and with_tax_id == sale_tax_id):
+                             company_match_found = True
+                             break # Found a matching company for this withholding
+
+                     if company_match_found:
+                        # Found a confirming withholding match
+                        self._withholding_matched_mask[with_pos] = True
+                        matched_info['matched_withholdings_indices'].append(with_idx)
+                        # Add company if not already added (e.g., from sale)
+                        if with_company:
+                             matched_info['companies'].append(with_company)
+                        # No need to update total_matched_amount or difference if a sale match was primary
+                        matched_info['match_type'] = matched_info.get('match_type', 'Sale') + '+Withholding' # Indicate confirmation
+                        logger.debug(f"  - Found confirming withholding match: Index={with_idx}, Company='{with_company_name}', Amount={with_amount:.2f}")
+                        # Keep looking for other confirming withholdings if multiple sales were matched?
+                        # For simplicity, let's just take the first confirming withholding for now.
+                        break
+
+                 else:
+                     # No Sale match was found. This withholding entry is a potential *fallback* match.
+                     # Treat this as the primary match if it's within tolerance and date range (already filtered)
+                     self._withholding_matched_mask[with_pos] = True
+
+                     matched_info['matched_withholdings_indices'].append(with_idx)
+                     matched_info['companies'].append(str(with_company_name))
+                     matched_info['total_matched_amount'] = with_amount
+                     matched_info['difference'] = deposit_amount - with_amount
+                     matched_info['is_matched'] = True
+                     matched_info['match_type'] = 'Withholding (Fallback)'
+
+                     logger.debug(f"  - Found fallback withholding match: Index={with_idx}, Company='{with_company_name}', Amount={with_amount:.2f}")
+                     # If we match via withholding fallback, we stop looking for sales for this deposit
+                     return matched_info # Return immediately after fallback match
+
+        # Final check if any match was found
+        if not matched_info['is_matched']:
+             logger.debug(f"  - No match found for deposit on {deposit_date.strftime('%y-%m-%d')} for amount {deposit_amount:.2f}")
+        else:
+             logger.debug(f"  - Deposit matched: Type='{matched_info['match_type']}', Matched Amount={matched_info['total_matched_amount']:.2f}, Diff={matched_info['difference']:.2f}")
+
+        return matched_info
+
+    def _match_withdrawal(self, pos: int) -> Dict:
         """
         Match a withdrawal with purchase invoices.
 
         Args:
-            withdrawal_idx: Index of the withdrawal in statement_df
+            pos: Position of the withdrawal in the date-sorted statement (see _statement_order)
 
         Returns:
             Dictionary with matching information
         """
-        withdrawal_row = self.statement_df.loc[statement_idx] # Use .loc
-        withdrawal_date = withdrawal_row['datetime']
-        withdrawal_amount = abs(float(withdrawal_row['amount']))  # Ensure positive float
+        statement_idx = self._statement_order[pos]
+        withdrawal_date = self._stmt_dates[pos]
+        withdrawal_amount = abs(float(self._stmt_amounts[pos]))  # Ensure positive float
 
         matched_info = {
             'statement_idx': statement_idx,
             'withdrawal_date': withdrawal_date,
             'withdrawal_amount': withdrawal_amount,
             'matched_purchases_indices': [], # Store indices
-            'companies': set(),
+            'companies': [], # Deduplicated when the report joins them
             'total_matched_amount': 0.0,
             'difference': withdrawal_amount,  # Initialize with full amount
             'is_matched': False,
             'match_type': 'None'
         }
 
+        if pd.isna(withdrawal_date):
+            # Raised so the driver passes it to the error callback; the entry is reported as unmatched
+            raise ValueError("Withdrawal has no date")
+
         logger.debug(f"Attempting to match withdrawal: statement_idx={statement_idx}, Date={withdrawal_date.strftime('%y-%m-%d')}, Amount={withdrawal_amount:.2f}")
 
-        candidate_purchases = self._find_candidate_purchases(withdrawal_date, withdrawal_amount)
+        candidate_positions = self._find_candidate_purchases(withdrawal_date, withdrawal_amount)
 
         # Look for single matches first (most common)
-        if not candidate_purchases.empty:
-            # Sort candidates by date descending to find recent purchases first
-            candidate_purchases = candidate_purchases.sort_values(by='date_of_purchase_invoice', ascending=False)
+        if candidate_positions.size:
+            # Take the most recent purchase (first one on equal dates); all candidates are already within tolerance
+            pos = candidate_positions[np.argmax(self._purchase_dates_i8[candidate_positions])]
+            idx = self.purchase_df.index[pos]
+            purchase_amount = float(self.purchase_df.at[idx, 'total_amount'])
 
-            for idx, purchase_row in candidate_purchases.iterrows():
-                purchase_amount = float(purchase_row['total_amount'])
+            self._purchase_matched_mask[pos] = True
 
-                # Check if this is a match within tolerance
-                if abs(purchase_amount - withdrawal_amount) <= self.purchase_tolerance:
-                     # Found a potential single purchase match
-                     if idx not in self.matched_purchase_indexes: # Ensure it's not already matched elsewhere
-                         self.matched_purchase_indexes.add(idx)
-                         self.purchase_df.loc[idx, 'matched'] = True # Use .loc
+            matched_info['matched_purchases_indices'].append(idx)
+            matched_info['companies'].append(str(self.purchase_df.at[idx, 'company_name']))
+            matched_info['total_matched_amount'] = purchase_amount
+            matched_info['difference'] = withdrawal_amount - purchase_amount
+            matched_info['is_matched'] = True
+            matched_info['match_type'] = 'Purchase (Single)'
 
-                         matched_info['matched_purchases_indices'].append(idx)
-                         matched_info['companies'].add(str(purchase_row['company_name']))
-                         matched_info['total_matched_amount'] = purchase_amount
-                         matched_info['difference'] = withdrawal_amount - purchase_amount
-                         matched_info['is_matched'] = True
-                         matched_info['match_type'] = 'Purchase (Single)'
-
-                         logger.debug(f"  - Found single purchase match: Index={idx}, Invoice='{purchase_row['purchase_invoice_id']}', Amount={purchase_amount:.2f}")
-                         return matched_info # Return after finding the first single match
+            logger.debug(f"  - Found single purchase match: Index={idx}, Invoice='{self.purchase_df.at[idx, 'purchase_invoice_id']}', Amount={purchase_amount:.2f}")
+            return matched_info # Return after finding the first single match
 
 
         # Note: Combinations for purchases are not explicitly requested, only for sales.
@@ -622,33 +813,20 @@ class TransactionMatcher:
         
         self.total_statement_entries = len(self.statement_df)
 
-        # Iterate through statement entries
-        # We process in order of statement date, which was sorted in _prepare_data
-        for idx in self.statement_df.index: # zero-indexed
-            try:
-                row = self.statement_df.loc[idx]
-                if row['isDeposit']:
-                    match_result = self._match_deposit(idx)
-                    # Append all deposits to the results list, mark if matched
-                    self.matched_deposits.append(match_result)
-                    if match_result['is_matched']:
-                         self.matched_statement_entries += 1
-                else: # isWithdrawal
-                    match_result = self._match_withdrawal(idx)
-                     # Append all withdrawals to the results list, mark if matched
-                    self.matched_withdrawals.append(match_result)
-                    if match_result['is_matched']:
-                         self.matched_statement_entries += 1
-            except Exception as e:
-                err_msg = f"Error processing statement entry at index {idx}: {e}"
-                logger.error(err_msg)
-                if self.error_callback:
-                    self.error_callback(err_msg)
-            finally:
-                self.processed_entries += 1
-                if self.progress_callback:
-                    self.progress_callback(self.processed_entries, self.total_statement_entries)
+        # Deposits only consume sale/withholding entries and withdrawals only consume purchases,
+        # so the two streams are independent and are matched one after the other.
+        # Each stream is still processed in order of statement date, which was computed in _prepare_data
+        is_deposit = self._stmt_is_deposit
+        self._match_statement_entries(np.flatnonzero(is_deposit), self._match_deposit, self.matched_deposits)
+        self._match_statement_entries(np.flatnonzero(~is_deposit), self._match_withdrawal, self.matched_withdrawals)
+
+        # Write invoice usage back for the reports in one assignment per dataframe
+        self.sale_df['matched'] = self._sale_matched
+        self.purchase_df['matched'] = self._purchase_matched_mask
+        self.withholding_df['matched'] = self._withholding_matched_mask
 
+        self.matched_statement_entries = sum(1 for match in self.matched_deposits if match['is_matched']) + \
+                                         sum(1 for match in self.matched_withdrawals if match['is_matched'])
         self.unmatched_statement_entries = self.total_statement_entries - self.matched_statement_entries
 
         logger.info(f"Transaction matching completed.")
@@ -661,19 +839,19 @@ class TransactionMatcher:
         logger.info(f" - Unmatched statement entries: {self.unmatched_statement_entries} ({unmatched_pct:.1f}%)")
         
         # Log matched counts and percentages
-        sale_matched = len(self.matched_sale_indexes)
+        sale_matched = int(self._sale_matched.sum())
         sale_total = len(self.sale_df) if not self.sale_df.empty else 0
         sale_unmatched = sale_total - sale_matched
         sale_matched_pct = (sale_matched/sale_total * 100) if sale_total > 0 else 0
         sale_unmatched_pct = (sale_unmatched/sale_total * 100) if sale_total > 0 else 0
         
-        purchase_matched = len(self.matched_purchase_indexes)
+        purchase_matched = int(self._purchase_matched_mask.sum())
         purchase_total = len(self.purchase_df) if not self.purchase_df.empty else 0
         purchase_unmatched = purchase_total - purchase_matched
         purchase_matched_pct = (purchase_matched/purchase_total * 100) if purchase_total > 0 else 0
         purchase_unmatched_pct = (purchase_unmatched/purchase_total * 100) if purchase_total > 0 else 0
         
-        withholding_matched = len(self.matched_withholding_indexes)
+        withholding_matched = int(self._withholding_matched_mask.sum())
         withholding_total = len(self.withholding_df) if not self.withholding_df.empty else 0
         withholding_unmatched = withholding_total - withholding_matched
         withholding_matched_pct = (withholding_matched/withholding_total * 100) if withholding_total > 0 else 0
@@ -684,9 +862,77 @@ class TransactionMatcher:
         logger.info(f" - Withholding entries: {withholding_matched}/{withholding_total} matched ({withholding_matched_pct:.1f}%), {withholding_unmatched} unmatched ({withholding_unmatched_pct:.1f}%)")
 
 
+    def _match_statement_entries(self,
+                                 statement_positions: np.ndarray,
+                                 match_func: Callable[[int], Dict],
+                                 results: List[Dict]) -> None:
+        """
+        Match a chronological run of statement entries with one matcher, appending every result.
+
+        Args:
+            statement_positions: Positions in the date-sorted statement to match, in processing order
+            match_func: _match_deposit or _match_withdrawal
+            results: List receiving the match information (all entries, matched or not)
+        """
+        # Fast path: no per-entry exception handling. On the first failure, report that entry
+        # and finish the remaining ones on the slow path, which guards each entry individually.
+        # Only match_func failures are handled here: failing_pos is cleared once an entry has matched,
+        # so an error raised by the progress callback propagates instead of being blamed on an entry.
+        failing_pos = None
+        try:
+            for done, pos in enumerate(statement_positions):
+                failing_pos = pos
+                results.append(match_func(pos))
+                failing_pos = None
+                self._advance_progress()
+        except Exception as e:
+            if failing_pos is None:
+                raise
+            self._report_entry_error(failing_pos, e)
+            self._advance_progress()
+            for pos in statement_positions[done + 1:]:
+                try:
+                    results.append(match_func(pos))
+                except Exception as e:
+                    self._report_entry_error(pos, e)
+                self._advance_progress()
+
+    def _report_entry_error(self, pos: int, error: Exception) -> None:
+        """Log a statement entry that failed to match and pass it to the error callback"""
+        err_msg = f"Error processing statement entry at index {self._statement_order[pos]}: {error}"
+        logger.error(err_msg)
+        if self.error_callback:
+            self.error_callback(err_msg)
+
+    def _advance_progress(self) -> None:
+        """Count one processed statement entry and report progress"""
+        self.processed_entries += 1
+        if self.progress_callback:
+            self.progress_callback(self.processed_entries, self.total_statement_entries)
+
+    @staticmethod
+    def _join_companies(companies: List[str]) -> str:
+        """Join the distinct matched company names in sorted order"""
+        # Most entries match a single company, which needs no dedupe or sort
+        if len(companies) == 1:
+            return companies[0]
+        return " , ".join(sorted(dict.fromkeys(companies)))
+
+    @staticmethod
+    def _sort_by_date(df: pd.DataFrame, date_col: str) -> pd.DataFrame:
+        """Stable sort of a report by its datetime64 column (NaT last), reordering rows with one take"""
+        order = np.argsort(df[date_col].to_numpy(), kind='stable')
+        sorted_df = df.take(order)
+        # take already produced a new frame; relabel it in place rather than paying for reset_index's copy
+        sorted_df.index = pd.RangeIndex(len(sorted_df))
+        return sorted_df
+
     def _get_thai_col_name(self, report_type: str, english_name: str) -> str:
-        """Helper to get Thai column name from mappings"""
-        return self.column_mappings.get(report_type, {}).get(english_name, english_name)
+        """Helper to get Thai column name from mappings (resolved once per report type and column)"""
+        key = (report_type, english_name)
+        if key not in self._thai_col_names:
+            self._thai_col_names[key] = self.column_mappings.get(report_type, {}).get(english_name, english_name)
+        return self._thai_col_names[key]
 
     def generate_transaction_match_report(self) -> pd.DataFrame:
         """
@@ -699,137 +945,144 @@ class TransactionMatcher:
         start_time = time.time()
         logger.info("Generating transaction match report...")
 
-        match_rows = []
+        col = self._txn_report_cols
+        thai_cols = self._txn_report_thai_cols
 
-        # Combine matched deposits and withdrawals for sorting
-        # Iterate through all statement entries in their original order
-        # Sort by original_index to maintain original file order before final date sort
-        statement_sorted_by_original_index = self.statement_df.sort_values(by='original_index').reset_index(drop=True)
-
-        for statement_idx, statement_row in statement_sorted_by_original_index.iterrows():
-            original_statement_index = statement_row.get('original_index', statement_idx)
-            is_deposit = statement_row['isDeposit']
-            txn_date = statement_row['datetime']
-            txn_amount = float(statement_row['amount'])
-
-            # Find the corresponding match info if it exists
-            match_info = None
-            if is_deposit:
-                # Search in matched_deposits
-                for match in self.matched_deposits:
-                    # Use original_index for lookup as statement_df might be re-indexed after sorting
-                    if self.statement_df.loc[match['statement_idx']].get('original_index', match['statement_idx']) == original_statement_index:
-                         match_info = match
-                         break
-            else: # isWithdrawal
-                # Search in matched_withdrawals
-                for match in self.matched_withdrawals:
-                    # Use original_index for lookup
-                    if self.statement_df.loc[match['statement_idx']].get('original_index', match['statement_idx']) == original_statement_index:
-                         match_info = match
-                         break
-
-            # Populate report row
-            row_data = {
-                self._get_thai_col_name('transaction_match_report', 'original_statement_index'): original_statement_index,
-                self._get_thai_col_name('transaction_match_report', 'transaction_type'): 'เงินฝาก' if is_deposit else 'เงินถอน',
-                self._get_thai_col_name('transaction_match_report', 'transaction_date'): txn_date,
-                self._get_thai_col_name('transaction_match_report', 'withdrawal_amount'): txn_amount if not is_deposit else 0.0,
-                self._get_thai_col_name('transaction_match_report', 'deposit_amount'): txn_amount if is_deposit else 0.0,
-                self._get_thai_col_name('transaction_match_report', 'matched_companies'): "",
-                self._get_thai_col_name('transaction_match_report', 'sale_tax_ids'): "",
-                self._get_thai_col_name('transaction_match_report', 'sale_invoice_numbers'): "",
-                self._get_thai_col_name('transaction_match_report', 'purchase_tax_ids'): "",
-                self._get_thai_col_name('transaction_match_report', 'purchase_invoice_numbers'): "",
-                self._get_thai_col_name('transaction_match_report', 'withholding_paid_dates'): "",
-                self._get_thai_col_name('transaction_match_report', 'total_matched_amount'): 0.0,
-                self._get_thai_col_name('transaction_match_report', 'difference'): txn_amount, # Initialize difference with full amount
-                self._get_thai_col_name('transaction_match_report', 'match_type'): "Unmatched",
-            }
-
-            if match_info:
-                row_data[self._get_thai_col_name('transaction_match_report', 'matched_companies')] = " , ".join(sorted(list(match_info.get('companies', set()))))
-                row_data[self._get_thai_col_name('transaction_match_report', 'total_matched_amount')] = match_info['total_matched_amount']
-                row_data[self._get_thai_col_name('transaction_match_report', 'difference')] = match_info['difference']
-                row_data[self._get_thai_col_name('transaction_match_report', 'match_type')] = match_info['match_type']
-
-                if is_deposit:
-                    # Populate sale and withholding details for deposits
-                    sale_invoice_tax_numbers = []
-                    sale_tax_ids = []
-                    for sale_idx in match_info.get('matched_sales_indices', []):
-                         if sale_idx in self.sale_df.index:
-                            sale_row = self.sale_df.loc[sale_idx]
-                            sale_invoice_tax_numbers.append(str(sale_row.get('sale_invoice_tax_number', 'N/A')))
-                            sale_tax_ids.append(str(sale_row.get('company_tax_id', 'N/A')))
-                    row_data[self._get_thai_col_name('transaction_match_report', 'sale_tax_ids')] = " , ".join(sale_tax_ids)
-                    row_data[self._get_thai_col_name('transaction_match_report', 'sale_invoice_numbers')] = " , ".join(sale_invoice_tax_numbers)
-
-                    withholding_paid_dates = []
-                    for with_idx in match_info.get('matched_withholdings_indices', []):
-                         if with_idx in self.withholding_df.index:
-                             with_row = self.withholding_df.loc[with_idx]
-                             paid_date = with_row.get('paid_date')
-                             withholding_paid_dates.append(paid_date.strftime('%y-%m-%d') if pd.notna(paid_date) else "")
-                    row_data[self._get_thai_col_name('transaction_match_report', 'withholding_paid_dates')] = " , ".join(withholding_paid_dates)
-
-                else: # isWithdrawal
-                    # Populate purchase details for withdrawals
-                    purchase_invoice_ids = []
-                    purchase_tax_ids = []
-                    for purchase_idx in match_info.get('matched_purchases_indices', []):
-                         if purchase_idx in self.purchase_df.index:
-                            purchase_row = self.purchase_df.loc[purchase_idx]
-                            purchase_invoice_ids.append(str(purchase_row.get('purchase_invoice_id', 'N/A')))
-                            purchase_tax_ids.append(str(purchase_row.get('company_tax_id', 'N/A')))
-                    row_data[self._get_thai_col_name('transaction_match_report', 'purchase_tax_ids')] = " , ".join(purchase_tax_ids)
-                    row_data[self._get_thai_col_name('transaction_match_report', 'purchase_invoice_numbers')] = " , ".join(purchase_invoice_ids)
-
-
-            match_rows.append(row_data)
-
-        if not match_rows:
+        if self.statement_df.empty:
             logger.warning("No matches found for transaction report")
             # Return an empty DataFrame with expected columns
-            thai_cols = [
-                self._get_thai_col_name('transaction_match_report', 'original_statement_index'),
-                self._get_thai_col_name('transaction_match_report', 'transaction_type'),
-                self._get_thai_col_name('transaction_match_report', 'transaction_date'),
-                self._get_thai_col_name('transaction_match_report', 'withdrawal_amount'),
-                self._get_thai_col_name('transaction_match_report', 'deposit_amount'),
-                self._get_thai_col_name('transaction_match_report', 'matched_companies'),
-                self._get_thai_col_name('transaction_match_report', 'sale_tax_ids'),
-                self._get_thai_col_name('transaction_match_report', 'sale_invoice_numbers'),
-                self._get_thai_col_name('transaction_match_report', 'purchase_tax_ids'),
-                self._get_thai_col_name('transaction_match_report', 'purchase_invoice_numbers'),
-                self._get_thai_col_name('transaction_match_report', 'withholding_paid_dates'),
-                self._get_thai_col_name('transaction_match_report', 'total_matched_amount'),
-                self._get_thai_col_name('transaction_match_report', 'difference'),
-                self._get_thai_col_name('transaction_match_report', 'match_type'),
-            ]
             return pd.DataFrame(columns=thai_cols)
 
-
-        match_df = pd.DataFrame(match_rows)
+        # Combine matched deposits and withdrawals for sorting
+        # Iterate through all statement entries in their original order
+        # statement_df keeps its original index, so index order is the original file order
+        statement_sorted_by_original_index = self.statement_df.sort_index()
+        n = len(statement_sorted_by_original_index)
+
+        # Build the report column by column: the statement columns come straight from the frame and
+        # the match columns from the match results, aligned to the statement by statement index
+        statement_indices = statement_sorted_by_original_index.index
+        is_deposit_values = statement_sorted_by_original_index['isDeposit'].to_numpy(dtype=bool)
+        txn_amounts = statement_sorted_by_original_index['amount'].to_numpy(dtype=float)
+
+        match_results = self.matched_deposits + self.matched_withdrawals
+        if match_results:
+            # Each statement entry has at most one result; validate='1:1' makes a duplicate fail loudly
+            match_frame = pd.DataFrame({'statement_idx': statement_indices}).merge(
+                pd.DataFrame(match_results), on='statement_idx', how='left', validate='1:1'
+            ).set_index('statement_idx')
+        else:
+            match_frame = pd.DataFrame(index=statement_indices, columns=['companies', 'total_matched_amount', 'difference', 'match_type'])
+
+        matched_companies = match_frame['companies'].map(self._join_companies, na_action='ignore').fillna("").to_numpy()
+        total_matched_amounts = match_frame['total_matched_amount'].astype(float).fillna(0.0).to_numpy()
+        differences = np.where(match_frame['difference'].isna(), txn_amounts, match_frame['difference'].astype(float)) # Unmatched keeps the full amount
+        match_types = match_frame['match_type'].fillna("Unmatched").to_numpy()
+
+        def joined(indices_col: str, values: pd.Series) -> np.ndarray:
+            """Join the values of each statement row's matched entries with ' , ' ("" when there are none)"""
+            if indices_col not in match_frame.columns:
+                return np.full(len(statement_indices), "", dtype=object)
+            exploded = match_frame[indices_col].explode().dropna()
+            # One reindex picks every matched entry's value; indices no longer in source_df come back NaN and are dropped
+            per_entry = pd.Series(values.reindex(exploded.to_numpy()).to_numpy(), index=exploded.index).dropna()
+            return per_entry.groupby(level=0, sort=False).agg(" , ".join).reindex(statement_indices, fill_value="").to_numpy()
+
+        def column_or_na(df: pd.DataFrame, column: str) -> pd.Series:
+            return df[column].astype(str) if column in df.columns else pd.Series('N/A', index=df.index)
+
+        # Sale and withholding details for deposits, purchase details for withdrawals
+        sale_tax_ids_col = joined('matched_sales_indices', column_or_na(self.sale_df, 'company_tax_id'))
+        sale_invoice_numbers = joined('matched_sales_indices', column_or_na(self.sale_df, 'sale_invoice_tax_number'))
+        # Only matched withholdings can appear in the report, so format just their paid dates in one pass
+        if 'paid_date' in self.withholding_df.columns:
+            paid_dates = self.withholding_df.loc[self._withholding_matched_mask, 'paid_date'].dt.strftime('%y-%m-%d').fillna("")
+        else:
+            paid_dates = pd.Series("", index=self.withholding_df.index)
+        withholding_paid_dates_col = joined('matched_withholdings_indices', paid_dates)
+        purchase_tax_ids_col = joined('matched_purchases_indices', column_or_na(self.purchase_df, 'company_tax_id'))
+        purchase_invoice_numbers = joined('matched_purchases_indices', column_or_na(self.purchase_df, 'purchase_invoice_id'))
+
+        match_df = pd.DataFrame({
+            col['original_statement_index']: statement_indices.to_numpy(),
+            col['transaction_type']: pd.Categorical.from_codes(is_deposit_values.astype(np.int8), categories=['เงินถอน', 'เงินฝาก']),
+            col['transaction_date']: statement_sorted_by_original_index['datetime'].to_numpy(),
+            col['withdrawal_amount']: np.where(is_deposit_values, 0.0, txn_amounts),
+            col['deposit_amount']: np.where(is_deposit_values, txn_amounts, 0.0),
+            col['matched_companies']: matched_companies,
+            col['sale_tax_ids']: sale_tax_ids_col,
+            col['sale_invoice_numbers']: sale_invoice_numbers,
+            col['purchase_tax_ids']: purchase_tax_ids_col,
+            col['purchase_invoice_numbers']: purchase_invoice_numbers,
+            col['withholding_paid_dates']: withholding_paid_dates_col,
+            col['total_matched_amount']: total_matched_amounts,
+            col['difference']: differences,
+            col['match_type']: pd.Categorical(match_types),
+        })
 
         # Convert date column to datetime *before* saving so save_dataframe can format it
         date_col_thai = self._get_thai_col_name('transaction_match_report', 'transaction_date')
         if date_col_thai in match_df.columns:
              # Convert back to datetime objects temporarily for sorting
              try:
-                 match_df[date_col_thai] = pd.to_datetime(match_df[date_col_thai], errors='coerce')
+                 # The column is normally datetime64 already (converted in _prepare_data); only parse it otherwise
+                 if not pd.api.types.is_datetime64_any_dtype(match_df[date_col_thai]):
+                     match_df[date_col_thai] = pd.to_datetime(match_df[date_col_thai], errors='coerce')
              except Exception as e:
                  logger.error(f"Error converting {date_col_thai} column to datetime: {e}")
                  # Return empty DF with expected columns
                  return pd.DataFrame(columns=thai_cols)
              # Sort by date
-             match_df = match_df.sort_values(by=date_col_thai).reset_index(drop=True)
+             match_df = self._sort_by_date(match_df, date_col_thai)
              # Dates will be formatted to 'yy-mm-dd' by save_dataframe
 
         elapsed_time = time.time() - start_time
         logger.info(f"Transaction match report generated in {elapsed_time:.2f} seconds.")
         return match_df
 
+    def _finalize_status_report(self,
+                                final_report: pd.DataFrame,
+                                date_col: str,
+                                numeric_cols: List[str],
+                                empty_cols: List[str]) -> pd.DataFrame:
+        """
+        Coerce a status report's date and amount columns and sort it by date.
+
+        errors='coerce' never raises on ordinary input, so one guard covers the whole step;
+        values that could not be converted are counted afterwards and logged per column.
+
+        Returns:
+            The finalized report, or an empty DataFrame with the expected columns on failure.
+        """
+        try:
+            coerced = {}
+            # The date column is normally datetime64 already (converted in _prepare_data); only parse it otherwise
+            if date_col in final_report.columns and not pd.api.types.is_datetime64_any_dtype(final_report[date_col]):
+                missing_before = final_report[date_col].isna().sum()
+                final_report[date_col] = pd.to_datetime(final_report[date_col], errors='coerce')
+                coerced[date_col] = final_report[date_col].isna().sum() - missing_before
+
+            # Upstream cleaning normally leaves these numeric already; coerce only the ones that are not, in one pass
+            cols_to_coerce = [col for col in numeric_cols
+                              if col in final_report.columns and not pd.api.types.is_numeric_dtype(final_report[col])]
+            if cols_to_coerce:
+                missing_before = final_report[cols_to_coerce].isna().sum()
+                # One assign builds the coerced frame in a single step instead of a setitem per column block
+                final_report = final_report.assign(**{col: pd.to_numeric(final_report[col], errors='coerce') for col in cols_to_coerce})
+                coerced.update((final_report[cols_to_coerce].isna().sum() - missing_before).items())
+
+            for col, count in coerced.items():
+                if count > 0:
+                    logger.warning(f"{count} value(s) in column '{col}' could not be converted and were left empty")
+
+            if date_col in final_report.columns:
+                final_report = self._sort_by_date(final_report, date_col)
+            return final_report
+        except Exception as e:
+            logger.error(f"Error preparing status report columns: {e}")
+            # Return empty DF with expected columns
+            return pd.DataFrame(columns=empty_cols)
+
     def generate_sale_match_report(self) -> pd.DataFrame:
         """
         Generate a report of sale invoices with match status.
@@ -844,97 +1097,55 @@ class TransactionMatcher:
         if self.sale_df.empty:
             logger.warning("Sale dataframe is empty. Cannot generate sale match report.")
             # Return an empty DataFrame with expected columns
-            thai_cols = [
-                self._get_thai_col_name('sale_tax_report', 'order_number'),
-                self._get_thai_col_name('sale_tax_report', 'date_of_sale_invoice'),
-                self._get_thai_col_name('sale_tax_report', 'sale_invoice_tax_number'),
-                self._get_thai_col_name('sale_tax_report', 'company_name'),
-                self._get_thai_col_name('sale_tax_report', 'company_tax_id'),
-                self._get_thai_col_name('sale_tax_report', 'product_value'),
-                self._get_thai_col_name('sale_tax_report', 'vat'),
-                self._get_thai_col_name('sale_tax_report', 'total_amount'),
-                self._get_thai_col_name('sale_tax_report', 'withholding_tax'),
-                self._get_thai_col_name('sale_tax_report', 'net_amount'),
-                self._get_thai_col_name('sale_tax_report', 'matched'),
-                self._get_thai_col_name('sale_tax_report', 'days_outstanding'), # Keep original column if present
-            ]
-            return pd.DataFrame(columns=thai_cols)
-
-
-        # Create a copy to work on
-        sale_report = self.sale_df.copy()
+            return pd.DataFrame(columns=self._sale_report_thai_cols)
 
-        # Map boolean 'matched' status to Thai strings
-        sale_report[self._get_thai_col_name('sale_tax_report', 'matched')] = sale_report['matched'].map({True: 'ใช่', False: 'ไม่'})
-
-        # Add original index back for sorting based on original file order if needed,
-        # but requirement is to sort by date. Let's keep original_index for reference.
-        sale_report[self._get_thai_col_name('sale_tax_report', 'original_index')] = sale_report['original_index']
-
-
-        # Select and rename columns using the mappings
-        thai_cols_mapping = {v: k for k, v in self.column_mappings.get('sale_tax_report', {}).items()} # Invert mapping for easy renaming
-        # Add 'matched' and 'original_index' which might not be in the original mapping
-        thai_cols_mapping[self._get_thai_col_name('sale_tax_report', 'matched')] = 'matched_status_thai'
-        thai_cols_mapping[self._get_thai_col_name('sale_tax_report', 'original_index')] = 'original_index'
 
+        # Build the report straight from sale_df's columns; nothing is added to it, so no copy is needed
+        names = self._report_names['sale_tax_report']
+        matched_col = names['matched']
+        original_index_col = names['original_index']
 
         # Build the report DataFrame with Thai columns directly
-        report_data = {}
-        for eng_col, thai_col in self.column_mappings.get('sale_tax_report', {}).items():
-             if eng_col in sale_report.columns:
-                 report_data[thai_col] = sale_report[eng_col]
-             else:
-                 logger.warning(f"Sale report: English column '{eng_col}' not found in processed sale_df.")
-                 report_data[thai_col] = None # Add empty column if missing
-
-        # Add the 'matched' status and original index columns
-        report_data[self._get_thai_col_name('sale_tax_report', 'matched')] = sale_report[self._get_thai_col_name('sale_tax_report', 'matched')]
-        report_data[self._get_thai_col_name('sale_tax_report', 'original_index')] = sale_report[self._get_thai_col_name('sale_tax_report', 'original_index')]
+        mapping = self.column_mappings.get('sale_tax_report', {})
+        present = set(self.sale_df.columns)
+        missing = [eng_col for eng_col in mapping if eng_col not in present]
+        if missing:
+            logger.warning(f"Sale report: English columns {missing} not found in processed sale_df.")
+        report_data = {
+            thai_col: self.sale_df[eng_col].values if eng_col in present
+            else np.full(len(self.sale_df), None, dtype=object) # Add empty column if missing
+            for eng_col, thai_col in mapping.items()
+        }
+
+        # Map the matched mask to Thai strings and keep the original index for reference
+        report_data[matched_col] = pd.Categorical.from_codes(self._sale_matched.astype(np.int8), categories=['ไม่', 'ใช่'])
+        report_data[original_index_col] = self.sale_df.index.to_numpy()
 
         # Include 'days_outstanding' if it exists in the original sale_df
-        days_outstanding_col = self._get_thai_col_name('sale_tax_report', 'days_outstanding')
-        if 'days_outstanding' in sale_report.columns:
-            report_data[days_outstanding_col] = sale_report['days_outstanding']
+        days_outstanding_col = names['days_outstanding']
+        if 'days_outstanding' in self.sale_df.columns:
+            report_data[days_outstanding_col] = self.sale_df['days_outstanding'].values
         else:
              logger.warning("Sale report: English column 'days_outstanding' not found in processed sale_df.")
-             report_data[days_outstanding_col] = None
-
-
-        final_report = pd.DataFrame(report_data)
-
-        # Ensure correct dtypes before sorting and saving
-        # Date column must be datetime for sorting and save_dataframe formatting
-        date_col_thai = self._get_thai_col_name('sale_tax_report', 'date_of_sale_invoice')
-        if date_col_thai in final_report.columns:
-            try:
-                final_report[date_col_thai] = pd.to_datetime(final_report[date_col_thai], errors='coerce')
-            except Exception as e:
-                logger.error(f"Error converting {date_col_thai} column to datetime: {e}")
-                # Return empty DF with expected columns
-                return pd.DataFrame(columns=thai_cols)
-
-        # Numeric columns should be numeric for rounding by save_dataframe
-        numeric_cols_thai = [
-             self._get_thai_col_name('sale_tax_report', 'product_value'),
-             self._get_thai_col_name('sale_tax_report', 'vat'),
-             self._get_thai_col_name('sale_tax_report', 'total_amount'),
-             self._get_thai_col_name('sale_tax_report', 'withholding_tax'),
-             self._get_thai_col_name('sale_tax_report', 'net_amount'),
-        ]
-        for col in numeric_cols_thai:
-             if col in final_report.columns:
-                  try:
-                      final_report[col] = pd.to_numeric(final_report[col], errors='coerce')
-                  except Exception as e:
-                      logger.error(f"Error converting {col} column to numeric: {e}")
-                      # Return empty DF with expected columns
-                      return pd.DataFrame(columns=thai_cols)
-
-
-        # Sort by date
-        if date_col_thai in final_report.columns:
-            final_report = final_report.sort_values(by=date_col_thai).reset_index(drop=True)
+             report_data[days_outstanding_col] = np.full(len(self.sale_df), None, dtype=object)
+
+
+        # Entries are plain column arrays (Categorical for the matched flag), so no per-Series index alignment is needed
+        final_report = pd.DataFrame(report_data, index=self.sale_df.index, copy=False)
+
+        # Date column must be datetime for sorting and save_dataframe formatting, amounts numeric for rounding
+        final_report = self._finalize_status_report(
+            final_report,
+            names['date_of_sale_invoice'],
+            [
+             names['product_value'],
+             names['vat'],
+             names['total_amount'],
+             names['withholding_tax'],
+             names['net_amount'],
+            ],
+            self._sale_report_thai_cols,
+        )
 
         elapsed_time = time.time() - start_time
         logger.info(f"Sale match status report generated in {elapsed_time:.2f} seconds.")
@@ -954,84 +1165,46 @@ class TransactionMatcher:
         if self.purchase_df.empty:
             logger.warning("Purchase dataframe is empty. Cannot generate purchase match report.")
             # Return an empty DataFrame with expected columns
-            thai_cols = [
-                self._get_thai_col_name('purchase_tax_report', 'order_number'),
-                self._get_thai_col_name('purchase_tax_report', 'date_of_purchase_invoice'),
-                self._get_thai_col_name('purchase_tax_report', 'purchase_invoice_tax_number'),
-                self._get_thai_col_name('purchase_tax_report', 'purchase_invoice_id'),
-                self._get_thai_col_name('purchase_tax_report', 'company_name'),
-                self._get_thai_col_name('purchase_tax_report', 'company_tax_id'),
-                self._get_thai_col_name('purchase_tax_report', 'product_value'),
-                self._get_thai_col_name('purchase_tax_report', 'vat'),
-                self._get_thai_col_name('purchase_tax_report', 'total_amount'),
-                self._get_thai_col_name('purchase_tax_report', 'matched'),
-            ]
-            return pd.DataFrame(columns=thai_cols)
+            return pd.DataFrame(columns=self._purchase_report_thai_cols)
+
+
+        # Build the report straight from purchase_df's columns; nothing is added to it, so no copy is needed
+        names = self._report_names['purchase_tax_report']
+        matched_col = names['matched']
+        original_index_col = names['original_index']
 
+        # Build the report DataFrame with Thai columns directly
+        mapping = self.column_mappings.get('purchase_tax_report', {})
+        present = set(self.purchase_df.columns)
+        missing = [eng_col for eng_col in mapping if eng_col not in present]
+        if missing:
+            logger.warning(f"Purchase report: English columns {missing} not found in processed purchase_df.")
+        report_data = {
+            thai_col: self.purchase_df[eng_col].values if eng_col in present
+            else np.full(len(self.purchase_df), None, dtype=object) # Add empty column if missing
+            for eng_col, thai_col in mapping.items()
+        }
 
-        # Create a copy to work on
-        purchase_report = self.purchase_df.copy()
+        # Map the matched mask to Thai strings and keep the original index for reference
+        report_data[matched_col] = pd.Categorical.from_codes(self._purchase_matched_mask.astype(np.int8), categories=['ไม่', 'ใช่'])
+        report_data[original_index_col] = self.purchase_df.index.to_numpy()
 
-        # Map boolean 'matched' status to Thai strings
-        purchase_report[self._get_thai_col_name('purchase_tax_report', 'matched')] = purchase_report['matched'].map({True: 'ใช่', False: 'ไม่'})
 
-        # Add original index back for reference
-        purchase_report[self._get_thai_col_name('purchase_tax_report', 'original_index')] = purchase_report['original_index']
+        # Entries are plain column arrays (Categorical for the matched flag), so no per-Series index alignment is needed
+        final_report = pd.DataFrame(report_data, index=self.purchase_df.index, copy=False)
 
 
-        # Build the report DataFrame with Thai columns directly
-        report_data = {}
-        for eng_col, thai_col in self.column_mappings.get('purchase_tax_report', {}).items():
-             if eng_col in purchase_report.columns:
-                 report_data[thai_col] = purchase_report[eng_col]
-             else:
-                 logger.warning(f"Purchase report: English column '{eng_col}' not found in processed purchase_df.")
-                 report_data[thai_col] = None # Add empty column if missing
-
-        # Add the 'matched' status and original index columns
-        report_data[self._get_thai_col_name('purchase_tax_report', 'matched')] = purchase_report[self._get_thai_col_name('purchase_tax_report', 'matched')]
-        report_data[self._get_thai_col_name('purchase_tax_report', 'original_index')] = purchase_report[self._get_thai_col_name('purchase_tax_report', 'original_index')]
-
-
-        final_report = pd.DataFrame(report_data)
-
-
-        # Ensure correct dtypes before sorting and saving
-        # Date column must be datetime for sorting and save_dataframe formatting
-        date_col_thai = self._get_thai_col_name('purchase_tax_report', 'date_of_purchase_invoice')
-        if date_col_thai in final_report.columns:
-            try:
-                final_report[date_col_thai] = pd.to_datetime(final_report[date_col_thai], errors='coerce')
-            except Exception as e:
-                logger.error(f"Error converting {date_col_thai} column to datetime: {e}")
-                # Return empty DF with expected columns
-                return pd.DataFrame(columns=thai_cols)
-
-
-        # Numeric columns should be numeric for rounding by save_dataframe
-        numeric_cols_thai = [
-             self._get_thai_col_name('purchase_tax_report', 'product_value'),
-             self._get_thai_col_name('purchase_tax_report', 'vat'),
-             self._get_thai_col_name('purchase_tax_report', 'total_amount'),
-        ]
-        for col in numeric_cols_thai:
-             if col in final_report.columns:
-                  try:
-                      final_report[col] = pd.to_numeric(final_report[col], errors='coerce')
-                  except Exception as e:
-                      logger.error(f"Error converting {col} column to numeric: {e}")
-                      # Return empty DF with expected columns
-                      return pd.DataFrame(columns=thai_cols)
-
-
-        # Sort by date
-        if date_col_thai in final_report.columns:
-            try:
-                final_report = final_report.sort_values(by=date_col_thai).reset_index(drop=True)
-            except Exception as e:
-                logger.error(f"Error sorting by {date_col_thai}: {e}")
-                # Return empty DF with expected columns
-                return pd.DataFrame(columns=thai_cols)
+        # Date column must be datetime for sorting and save_dataframe formatting, amounts numeric for rounding
+        final_report = self._finalize_status_report(
+            final_report,
+            names['date_of_purchase_invoice'],
+            [
+             names['product_value'],
+             names['vat'],
+             names['total_amount'],
+            ],
+            self._purchase_report_thai_cols,
+        )
 
         elapsed_time = time.time() - start_time
         logger.info(f"Purchase match status report generated in {elapsed_time:.2f} seconds.")
@@ -1051,114 +1224,55 @@ class TransactionMatcher:
         if self.withholding_df.empty:
             logger.warning("Withholding dataframe is empty. Cannot generate withholding match report.")
              # Return an empty DataFrame with expected columns
-            thai_cols = [
-                self._get_thai_col_name('withholding_tax_report', 'paid_date'),
-                self._get_thai_col_name('withholding_tax_report', 'company_name'),
-                self._get_thai_col_name('withholding_tax_report', 'tax_id'),
-                self._get_thai_col_name('withholding_tax_report', 'amount'),
-                self._get_thai_col_name('withholding_tax_report', 'withholding_tax'),
-                self._get_thai_col_name('withholding_tax_report', 'paid_amount'),
-                self._get_thai_col_name('withholding_tax_report', 'matched'),
-                self._get_thai_col_name('withholding_tax_report', 'days_since_payment'), # Keep original column if present
-            ]
-            return pd.DataFrame(columns=thai_cols)
+            return pd.DataFrame(columns=self._withholding_report_thai_cols)
 
 
-        # Create a copy to work on
-        withholding_report = self.withholding_df.copy()
-
-        # Map boolean 'matched' status to Thai strings
-        withholding_report[self._get_thai_col_name('withholding_tax_report', 'matched')] = withholding_report['matched'].map({True: 'ใช่', False: 'ไม่'})
-
-        # Add original index back for reference
-        withholding_report[self._get_thai_col_name('withholding_tax_report', 'original_index')] = withholding_report['original_index']
-
+        # Build the report straight from withholding_df's columns; nothing is added to it, so no copy is needed
+        names = self._report_names['withholding_tax_report']
+        matched_col = names['matched']
+        original_index_col = names['original_index']
 
         # Build the report DataFrame with Thai columns directly
-        report_data = {}
-        for eng_col, thai_col in self.column_mappings.get('withholding_tax_report', {}).items():
-             if eng_col in withholding_report.columns:
-                 report_data[thai_col] = withholding_report[eng_col]
-             else:
-                 logger.warning(f"Withholding report: English column '{eng_col}' not found in processed withholding_df.")
-                 report_data[thai_col] = None # Add empty column if missing
-
-        # Add the 'matched' status and original index columns
-        report_data[self._get_thai_col_name('withholding_tax_report', 'matched')] = withholding_report[self._get_thai_col_name('withholding_tax_report', 'matched')]
-        report_data[self._get_thai_col_name('withholding_tax_report', 'original_index')] = withholding_report[self._get_thai_col_name('withholding_tax_report', 'original_index')]
+        mapping = self.column_mappings.get('withholding_tax_report', {})
+        present = set(self.withholding_df.columns)
+        missing = [eng_col for eng_col in mapping if eng_col not in present]
+        if missing:
+            logger.warning(f"Withholding report: English columns {missing} not found in processed withholding_df.")
+        report_data = {
+            thai_col: self.withholding_df[eng_col].values if eng_col in present
+            else np.full(len(self.withholding_df), None, dtype=object) # Add empty column if missing
+            for eng_col, thai_col in mapping.items()
+        }
+
+        # Map the matched mask to Thai strings and keep the original index for reference
+        report_data[matched_col] = pd.Categorical.from_codes(self._withholding_matched_mask.astype(np.int8), categories=['ไม่', 'ใช่'])
+        report_data[original_index_col] = self.withholding_df.index.to_numpy()
 
         # Include 'days_since_payment' if it exists in the original withholding_df
-        days_col_thai = self._get_thai_col_name('withholding_tax_report', 'days_since_payment')
-        if 'days_since_payment' in withholding_report.columns:
-            report_data[days_col_thai] = withholding_report['days_since_payment']
+        days_col_thai = names['days_since_payment']
+        if 'days_since_payment' in self.withholding_df.columns:
+            report_data[days_col_thai] = self.withholding_df['days_since_payment'].values
         else:
              logger.warning("Withholding report: English column 'days_since_payment' not found in processed withholding_df.")
-             report_data[days_col_thai] = None
-
-
-        final_report = pd.DataFrame(report_data)
-
-
-        # Ensure correct dtypes before sorting and saving
-        # Date column must be datetime for sorting and save_dataframe formatting
-        date_col_thai = self._get_thai_col_name('withholding_tax_report', 'paid_date')
-        if date_col_thai in final_report.columns:
-            try:
-                final_report[date_col_thai] = pd.to_datetime(final_report[date_col_thai], errors='coerce')
-            except Exception as e:
-                logger.error(f"Error converting {date_col_thai} column to datetime: {e}")
-                # Return empty DF with expected columns
-                return pd.DataFrame(columns=thai_cols)
-
-
-        # Numeric columns should be numeric for rounding by save_dataframe
-        numeric_cols_thai = [
-             self._get_thai_col_name('withholding_tax_report', 'amount'),
-             self._get_thai_col_name('withholding_tax_report', 'withholding_tax'),
-             self._get_thai_col_name('withholding_tax_report', 'paid_amount'),
-        ]
-        for col in numeric_cols_thai:
-             if col in final_report.columns:
-                  try:
-                      final_report[col] = pd.to_numeric(final_report[col], errors='coerce')
-                  except Exception as e:
-                      logger.error(f"Error converting {col} column to numeric: {e}")
-                      # Return empty DF with expected columns
-                      return pd.DataFrame(columns=thai_cols)
-
-
-        # Sort by date
-        if date_col_thai in final_report.columns:
-            try:
-                final_report = final_report.sort_values(by=date_col_thai).reset_index(drop=True)
-            except Exception as e:
-                logger.error(f"Error sorting by {date_col_thai}: {e}")
-                # Return empty DF with expected columns
-                return pd.DataFrame(columns=thai_cols)
+             report_data[days_col_thai] = np.full(len(self.withholding_df), None, dtype=object)
 
-        elapsed_time = time.time() - start_time
-        logger.info(f"Withholding match status report generated in {elapsed_time:.2f} seconds.")
-        return final_report
 
+        # Entries are plain column arrays (Categorical for the matched flag), so no per-Series index alignment is needed
+        final_report = pd.DataFrame(report_data, index=self.withholding_df.index, copy=False)
 
-# Define transaction match report columns using English names internally, map to Thai in report generation
-TransactionMatcher.TRANSACTION_REPORT_COLS_MAP = {
-    'original_statement_index': 'ลำดับเดิม Statement', # Added for reference
-    'transaction_type': 'ประเภทรายการ',
-    'transaction_date': 'วันที่ทำรายการ',
-    'withdrawal_amount': 'จำนวนเงินถอน', # Updated column
-    'deposit_amount': 'จำนวนเงินฝาก', # Updated column
-    'matched_companies': 'บริษัทที่จับคู่',
-    'sale_tax_ids': 'เลขประจำตัวผู้เสียภาษี (ขาย)',
-    'sale_invoice_numbers': 'เลขที่ใบกำกับภาษี (ขาย)',
-    'purchase_tax_ids': 'เลขประจำตัวผู้เสียภาษี (ซื้อ)',
-    'purchase_invoice_numbers': 'เลขที่ใบกำกับภาษี/เอกสาร (ซื้อ)',
-    'withholding_paid_dates': 'วันที่จ่าย (ภงด)',
-    'total_matched_amount': 'ยอดใบแจ้งหนี้ที่จับคู่รวม',
-    'difference': 'ส่วนต่าง',
-    'match_type': 'ประเภทการจับคู่', # Added for debugging/analysis
-}
-
-# Add transaction_match_report mapping to EXPECTED_COLUMN_MAPPINGS conceptually
-# This is just a conceptual mapping used within TransactionMatcher, not required in main.py CONFIG
 
+        # Date column must be datetime for sorting and save_dataframe formatting, amounts numeric for rounding
+        final_report = self._finalize_status_report(
+            final_report,
+            names['paid_date'],
+            [
+             names['amount'],
+             names['withholding_tax'],
+             names['paid_amount'],
+            ],
+            self._withholding_report_thai_cols,
+        )
+
+        elapsed_time = time.time() - start_time
+        logger.info(f"Withholding match status report generated in {elapsed_time:.2f} seconds.")
+        return final_report
@@ -2,12 +2,37 @@
 import pandas as pd
 import numpy as np
 import json
-from re import search
+import re
+import logging
 from typing import Tuple, List
 from utils import get_logger
 
 logger = get_logger()
 
+# Thai unicode range: \u0E00-\u0E7F, English letters and numbers
+VALID_CONTENT_PATTERN = re.compile(r'[\u0E00-\u0E7F\w\d]+')
+
+# Company tax ID (13 digits) and document ID patterns that keep a column from numeric conversion
+COMPANY_TAX_ID_PATTERN = re.compile(r'^\d{13}$')
+DOCUMENT_ID_PATTERN = re.compile(r'^(?:\d{1,4}[-/]?\d{1,4}|[A-Z]{2,}\d+|\d{6,})')
+
+# Cell values treated as empty when looking for empty columns
+EMPTY_PLACEHOLDERS = ['X', 'x', '']
+
+# Date and time cell patterns used to detect date/time columns, compiled once as a single alternation each
+DATE_COLUMN_PATTERN = re.compile('|'.join([
+    # Year first formats (YYYY-MM-DD or YY-MM-DD)
+    r'^\d{2,4}[\/\-\.]{1}\d{1,2}[\/\-\.]{1}\d{1,2}',
+    # Day first formats (DD-MM-YYYY or DD-MM-YY)
+    r'^\d{1,2}[\/\-\.]{1}\d{1,2}[\/\-\.]{1}\d{2,4}',
+    # Add support for month names (Jan-15-2024)
+    r'^(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[\/\-\s\.]{1}\d{1,2}[\/\-\s\.]{1}\d{2,4}$'
+]))
+TIME_COLUMN_PATTERN = re.compile('|'.join([
+    r'^\d{1,2}:\d{2}(?::\d{2})?$',  # HH:MM or HH:MM:SS
+    r'^(?:2[0-3]|[01]?[0-9]):[0-5][0-9](?::[0-5][0-9])?$'  # Strict time validation
+]))
+
 class DataFrameCleaner:
     """Handles DataFrame cleaning with single responsibility methods"""
     
@@ -25,11 +50,10 @@ class DataFrameCleaner:
             if missing_cols:
                 raise ValueError(f"Columns {missing_cols} not found in DataFrame")
             
-            filled_df = df.copy()
-
-            for col, default_value in zip(columns, default_values):
-                filled_df[col] = filled_df[col].fillna(default_value)
-                logger.debug(f"Filled column '{col}' with default value '{default_value}'")
+            # One fillna call over all requested columns; it returns a new frame, so no separate copy is needed
+            fill_values = dict(zip(columns, default_values))
+            filled_df = df.fillna(value=fill_values)
+            logger.debug(f"Filled columns with default values: {fill_values}")
 
             return filled_df
         except Exception as e:
@@ -44,13 +68,13 @@ class DataFrameCleaner:
                 if column not in df.columns:
                     raise ValueError(f"Column {column} not found in DataFrame")
                 any_na_rows = df[[column]].isna().any(axis=1)
-                logger.debug(f"any_na_rows: \n{any_na_rows}")
-                rows = df.index[any_na_rows].tolist()
                 if any_na_rows.any():
-                    logger.debug(f"Found rows containing NA values: \n{rows}")
-                    # Display the actual data of rows containing NA values
-                    na_rows_data = df[any_na_rows]
-                    logger.debug(f"NA rows data:\n{na_rows_data}")
+                    # The row listings are only built when debug logging is on
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"any_na_rows: \n{any_na_rows}")
+                        logger.debug(f"Found rows containing NA values: \n{df.index[any_na_rows].tolist()}")
+                        # Display the actual data of rows containing NA values
+                        logger.debug(f"NA rows data:\n{df[any_na_rows]}")
                     logger.warning(f"Column '{column}' contains NaN values")
                 else:
                     logger.debug(f"No NA values found in column {column}")
@@ -62,21 +86,16 @@ class DataFrameCleaner:
     def remove_empty_rows(df: pd.DataFrame) -> pd.DataFrame:
         """Remove rows where all values are null/empty"""
         try:
-            before_count = len(df)
-            # Store indices before dropping
-            before_indices = set(df.index)
-            any_na_rows = df.isna().any(axis=1)
-            rows = df.index[any_na_rows].tolist()
-            if any_na_rows.any():
-                logger.debug(f"Found rows containing NA values: \n{rows}")
-                # Display the actual data of rows containing NA values
-                na_rows_data = df[any_na_rows]
-                logger.debug(f"NA rows data:\n{na_rows_data}")
-                df = df.dropna(how='any')
-                # Find dropped indices
-                dropped_indices = before_indices - set(df.index)
-                removed_count = before_count - len(df)
-                logger.debug(f"Removed {removed_count} empty rows at indices: {sorted(list(dropped_indices))}")
+            # One mask for rows with any missing value; the row labels are only listed when debug logging is on
+            any_na_rows = df.isna().any(axis=1).to_numpy()
+            removed_count = int(any_na_rows.sum())
+            if removed_count:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Found rows containing NA values: \n{df.index[any_na_rows].tolist()}")
+                    # Display the actual data of rows containing NA values
+                    logger.debug(f"NA rows data:\n{df[any_na_rows]}")
+                df = df.loc[~any_na_rows]
+                logger.debug(f"Removed {removed_count} empty rows")
             else:
                 logger.debug("No any empty rows found")
             return df
@@ -90,31 +109,37 @@ class DataFrameCleaner:
         before_cols = df.columns.tolist()
         logger.debug("Removing column containing only empty values['X', 'x', '']")
         logger.debug(f"Before removing empty columns: {before_cols}")
-        df = df.replace(['X', 'x', ''], np.nan)
-        df = df.dropna(axis=1, how='all')
+        # One isin per object column finds the placeholder cells; a column is dropped when every cell is a
+        # placeholder or missing. Only kept columns that contain placeholders are rewritten to NaN; the rest
+        # just get the object-dtype inference that replace() applies to every object column
+        df = df.copy(deep=False) # The rewrites below must not reach the caller's frame
+        keep_positions = []
+        for position in range(df.shape[1]):
+            column = df.iloc[:, position]
+            missing = column.isna()
+            placeholders = None
+            if pd.api.types.is_object_dtype(column):
+                placeholders = column.isin(EMPTY_PLACEHOLDERS)
+                missing |= placeholders
+            if missing.all():
+                continue
+            keep_positions.append(position)
+            if placeholders is not None:
+                df.isetitem(position, column.replace(EMPTY_PLACEHOLDERS, np.nan) if placeholders.any() else column.infer_objects())
+        df = df.iloc[:, keep_positions]
         removed_cols = set(before_cols) - set(df.columns.tolist())
         if removed_cols:
             logger.debug(f"Removed empty columns: {sorted(removed_cols)}")
         return df
 
-    @staticmethod
-    def is_valid_content(text: str) -> bool:
-        """Check if string contains Thai, English, or numbers"""
-        if pd.isna(text):
-            return False
-        # Thai unicode range: \u0E00-\u0E7F
-        # English letters and numbers
-        pattern = r'[\u0E00-\u0E7F\w\d]+'
-        return bool(search(pattern, str(text)))
-
     @staticmethod
     def remove_invalid_content_columns(df: pd.DataFrame) -> pd.DataFrame:
         """Remove columns with no valid Thai/English/numeric content"""
         try:
             invalid_cols = []
             for col in df.columns:
-                # Check if column has any valid content
-                if not df[col].apply(DataFrameCleaner.is_valid_content).any():
+                # Check if column has any valid content: one vectorized regex pass over the non-null values
+                if not df[col].dropna().astype(str).str.contains(VALID_CONTENT_PATTERN).any():
                     invalid_cols.append(col)
             
             if invalid_cols:
@@ -143,8 +168,8 @@ class DataFrameCleaner:
                     logger.debug(f"Skipped column '{col}' due to non-object dtype")
                     continue
     
-                # Count real NaN and empty values (before string conversion)
-                nan_count = df[col].isna().sum() + (df[col] == '').sum()
+                # Count real NaN and empty values (before string conversion) from one combined mask
+                nan_count = int((df[col].isna() | df[col].eq('')).sum())
                 
                 # Skip if too many NaNs
                 if nan_count > 1:
@@ -155,23 +180,27 @@ class DataFrameCleaner:
                 # Convert to string for analysis
                 string_values = df[col].astype(str).str.strip()
 
-                # Check for company tax ID pattern (13 digits)
-                company_tax_id_pattern = r'^\d{13}$'
-                has_tax_id = string_values.str.match(company_tax_id_pattern).any()
+                # Check for company tax ID pattern (13 digits), only regex-matching the values of length 13
+                tax_id_candidates = string_values[string_values.str.len().to_numpy() == 13]
+                has_tax_id = tax_id_candidates.str.match(COMPANY_TAX_ID_PATTERN).any()
                 if has_tax_id:
                     logger.debug(f"Skipped column '{col}' due to company tax ID pattern")
                     continue
     
-                # Check if more than 80% are numeric
-                numeric_mask = pd.to_numeric(string_values, errors='coerce').notna()
+                # Check if more than 80% are numeric. For an all-string column the coerced raw values give the
+                # same mask as the stripped strings, so one to_numeric serves for both the check and the result
+                numeric_values = pd.to_numeric(df[col], errors='coerce')
+                if pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+                    numeric_mask = numeric_values.notna()
+                else:
+                    numeric_mask = pd.to_numeric(string_values, errors='coerce').notna()
                 if numeric_mask.mean() > 0.8:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+                    df[col] = numeric_values
                     logger.debug(f"Converted column '{col}' to numeric")
                     continue
 
                 # Check for document ID patterns (including partial matches)
-                id_pattern = r'^(?:\d{1,4}[-/]?\d{1,4}|[A-Z]{2,}\d+|\d{6,})'
-                has_id_format = string_values.str.match(id_pattern).any()
+                has_id_format = string_values.str.match(DOCUMENT_ID_PATTERN).any()
 
                 if has_id_format:
                     logger.debug(f"Skipped column '{col}' due to document ID pattern")
@@ -189,9 +218,10 @@ class DataFrameCleaner:
     def standardize_whitespace(df: pd.DataFrame) -> pd.DataFrame:
         """Standardize whitespace in string columns"""
         for col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].astype(str).str.strip() # Converts values to strings (handles non-string data safely) and Removes leading/trailing whitespace
-            #NOTE - Use with CAUTION! the following line may impact the performance on a large dataset, consider using apply instead
-            df[col] = df[col].replace(r'\s+', ' ', regex=True) # Replaces internal space in the string with single space
+            # Converts values to strings (handles non-string data safely), removes leading/trailing whitespace and
+            # replaces internal whitespace runs with a single space. str.split() uses the same whitespace set as the
+            # regex \s, so split/join gives the same result as strip() + replace(r'\s+', ' ') without the per-cell regex
+            df[col] = np.array([' '.join(value.split()) for value in df[col].astype(str)], dtype=object)
             logger.debug(f"Standardized whitespace in column '{col}'")
         return df
     
@@ -230,26 +260,52 @@ class DataFrameCleaner:
             logger.warning(f"Date conversion failed for {date_str}: {str(e)}")
             return date_str
     
+    @staticmethod
+    def _convert_thai_date_series(values: pd.Series) -> pd.Series:
+        """
+        Vectorized _convert_thai_date over a whole column, producing the same strings
+
+        :param values: Date column (datetime64 or strings)
+        :return: Converted date strings
+        """
+        def two_digits(numbers: pd.Series) -> pd.Series:
+            # Same as f"{n:02d}" (negative numbers keep their sign and are not padded further)
+            return numbers.astype(str).str.zfill(2)
+
+        if pd.api.types.is_datetime64_dtype(values):
+            # str() of these values always has "-", so _convert_thai_date would re-parse them; use the components directly
+            converted = (two_digits(values.dt.day.astype('Int64')) + "/" + two_digits(values.dt.month.astype('Int64'))
+                         + "/" + two_digits((values.dt.year - 1900 - 43).astype('Int64')))
+            return converted.where(values.notna(), "NaT")
+
+        converted = values.astype(str)
+        # "dd/mm/yy" (or yyyy) digit strings: BE to CE from the last two year digits, one pass over the column
+        parts = converted.str.extract(r'^([0-9]{1,9})/([0-9]{1,9})/([0-9]{1,9})$')
+        is_plain = parts[0].notna()
+        if is_plain.any():
+            plain = parts[is_plain]
+            converted[is_plain] = (two_digits(plain[0].astype(np.int64)) + "/" + two_digits(plain[1].astype(np.int64))
+                                   + "/" + two_digits(plain[2].str[-2:].astype(np.int64) - 43))
+
+        # Anything else with a separator (Excel datetime strings, irregular splits) takes the scalar path once per distinct value
+        rest = ~is_plain & (converted.str.contains("-", regex=False) | converted.str.contains("/", regex=False))
+        if rest.any():
+            lookup = {value: DataFrameCleaner._convert_thai_date(value) for value in pd.unique(converted[rest])}
+            converted[rest] = converted[rest].map(lookup)
+        return converted
+
     @staticmethod
     def _find_date_column(df: pd.DataFrame) -> List[str]:
         """
         find a column that look like date column from a datafram by Regex
         """
         try:
-            possible_date_formats = [
-                # Year first formats (YYYY-MM-DD or YY-MM-DD)
-                r'^\d{2,4}[\/\-\.]{1}\d{1,2}[\/\-\.]{1}\d{1,2}',
-                # Day first formats (DD-MM-YYYY or DD-MM-YY)
-                r'^\d{1,2}[\/\-\.]{1}\d{1,2}[\/\-\.]{1}\d{2,4}',
-                # Add support for month names (Jan-15-2024)
-                r'^(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[\/\-\s\.]{1}\d{1,2}[\/\-\s\.]{1}\d{2,4}$'
-            ]
             date_columns = []
             for col in df.columns:
                 if df[col].dtype == 'datetime64[ns]':
                     date_columns.append(col)
                 elif df[col].dtype == 'object':  # Only check object type columns
-                    if df[col].dropna().astype(str).str.match('|'.join(possible_date_formats)).any():
+                    if df[col].dropna().astype(str).str.match(DATE_COLUMN_PATTERN).any():
                         date_columns.append(col)
                         logger.debug(f"found date column: {col}")
             return date_columns
@@ -259,27 +315,31 @@ class DataFrameCleaner:
             raise
 
     @staticmethod
-    def _find_time_column(df: pd.DataFrame) -> List[str]:
-        """Find columns containing time format data"""
+    def _find_datetime_columns(df: pd.DataFrame) -> Tuple[List[str], List[str]]:
+        """
+        Find date and time columns in one sweep over the columns, converting each string column to str only once
+
+        :return: (date columns, time columns)
+        """
         try:
-            # Time format patterns
-            time_patterns = [
-                r'^\d{1,2}:\d{2}(?::\d{2})?$',  # HH:MM or HH:MM:SS
-                r'^(?:2[0-3]|[01]?[0-9]):[0-5][0-9](?::[0-5][0-9])?$'  # Strict time validation
-            ]
-            
+            date_columns = []
             time_columns = []
             for col in df.columns:
-                if df[col].dtype == 'object':  # Only check string columns
-                    # Check if any non-null value matches time pattern
-                    if df[col].dropna().astype(str).str.match('|'.join(time_patterns)).any():
+                if df[col].dtype == 'datetime64[ns]':
+                    date_columns.append(col)
+                elif df[col].dtype == 'object':  # Only check string columns
+                    # Check if any non-null value matches the date or time pattern
+                    values = df[col].dropna().astype(str)
+                    if values.str.match(DATE_COLUMN_PATTERN).any():
+                        date_columns.append(col)
+                        logger.debug(f"found date column: {col}")
+                    if values.str.match(TIME_COLUMN_PATTERN).any():
                         time_columns.append(col)
                         logger.debug(f"found time column: {col}")
-            
-            return time_columns
-    
+            return date_columns, time_columns
+
         except Exception as e:
-            logger.error(f"Error finding time columns: {e}")
+            logger.error(f"Error finding date/time columns: {e}")
             raise
 
     @staticmethod
@@ -289,11 +349,10 @@ class DataFrameCleaner:
         """
         try:
             logger.info("Merging transaction and datetime columns")
-            df = df.copy()
+            df = df.copy(deep=False) # Columns are replaced, never written in place, so the caller's frame is untouched
             
             # 1. Find date and time columns
-            date_columns = DataFrameCleaner._find_date_column(df)
-            time_columns = DataFrameCleaner._find_time_column(df)
+            date_columns, time_columns = DataFrameCleaner._find_datetime_columns(df)
             
             if not date_columns:
                 raise ValueError("No date column found")
@@ -320,38 +379,29 @@ class DataFrameCleaner:
                 raise ValueError("Could not find deposit/withdrawal columns")
             
             # 4. Create amount column and isDeposit indicator
-            df[deposit_col] = pd.to_numeric(df[deposit_col], errors='coerce').fillna(0).astype(float)
-            df[withdraw_col] = pd.to_numeric(df[withdraw_col], errors='coerce').fillna(0).astype(float)
-            
-            # Set amount based on which column has a value
-            df['amount'] = 0.0
-            df['isDeposit'] = "False"
-            
-            # Handle deposits
-            deposit_mask = df[deposit_col] > 0
-            df.loc[deposit_mask, 'amount'] = df.loc[deposit_mask, deposit_col]
-            df.loc[deposit_mask, 'isDeposit'] = "True"
+            deposits = pd.to_numeric(df[deposit_col], errors='coerce').fillna(0).astype(float).to_numpy()
+            withdrawals = pd.to_numeric(df[withdraw_col], errors='coerce').fillna(0).astype(float).to_numpy()
             
-            # Handle withdrawals
-            withdraw_mask = df[withdraw_col] > 0
-            df.loc[withdraw_mask, 'amount'] = df.loc[withdraw_mask, withdraw_col]
-            df.loc[withdraw_mask, 'isDeposit'] = "False"
+            # Set amount based on which column has a value; a withdrawal wins when both columns have one
+            deposit_mask = deposits > 0
+            withdraw_mask = withdrawals > 0
+            amounts = np.where(withdraw_mask, withdrawals, np.where(deposit_mask, deposits, 0.0))
             
             # Round amounts to 2 decimal places
-            df['amount'] = df['amount'].round(2)
-            
-            # 6. Rename remaining columns
-            column_mapping = {
-                'คงเหลือ': 'balance',
-                'หน้าที่': 'page'
-            }
-            df = df.rename(columns=column_mapping)
-            
-            # 7. Select and reorder columns
-            final_columns = ['datetime', 'amount', 'isDeposit', 'balance', 'page']
-            df = df[final_columns]
-            
-            logger.debug(f"Merged transaction columns. Result:\n{df.head()}")
+            df['amount'] = np.round(amounts, 2)
+            df['isDeposit'] = np.where(deposit_mask & ~withdraw_mask, "True", "False").astype(object)
+            
+            # 6. Build the final frame in the output column order, renaming the balance and page columns on the way
+            df = pd.DataFrame({
+                'datetime': df['datetime'].array,
+                'amount': df['amount'].array,
+                'isDeposit': df['isDeposit'].array,
+                'balance': df['คงเหลือ'].array,
+                'page': df['หน้าที่'].array
+            }, index=df.index, copy=False)
+            
+            if logger.isEnabledFor(logging.DEBUG): # The frame preview is only formatted when it will be logged
+                logger.debug(f"Merged transaction columns. Result:\n{df.head()}")
             return df
             
         except Exception as e:
@@ -377,8 +427,8 @@ class DataFrameCleaner:
         
         try:
             logger.info("Starting DataFrame cleaning process")
-            # Make a copy to avoid modifying original
-            df = df.copy()
+            # Make a copy to avoid modifying original (shallow: the steps below replace columns rather than write into them)
+            df = df.copy(deep=False)
             
             # Remove empty columns
             original_cols = len(df.columns)
@@ -407,7 +457,7 @@ class DataFrameCleaner:
                 raise ValueError("No date columns found for conversion")
 
             for col in date_columns:
-                df[col] = df[col].astype(str).apply(DataFrameCleaner._convert_thai_date)
+                df[col] = DataFrameCleaner._convert_thai_date_series(df[col])
                 df[col] = pd.to_datetime(df[col])
                 logger.info(f"Converted column '{col}' to datetime")
 
@@ -440,8 +490,8 @@ class DataFrameCleaner:
         
         try:
             logger.info("Starting DataFrame cleaning process")
-            # Make a copy to avoid modifying original
-            df = df.copy()
+            # Make a copy to avoid modifying original (shallow: the steps below replace columns rather than write into them)
+            df = df.copy(deep=False)
             
             # Remove empty columns
             original_cols = len(df.columns)
@@ -471,7 +521,7 @@ class DataFrameCleaner:
                 raise ValueError("No date columns found for conversion")
 
             for col in date_columns:
-                df[col] = df[col].astype(str).apply(DataFrameCleaner._convert_thai_date)
+                df[col] = DataFrameCleaner._convert_thai_date_series(df[col])
                 df[col] = pd.to_datetime(df[col])
                 logger.info(f"Converted column '{col}' to datetime")
 
@@ -504,8 +554,8 @@ class DataFrameCleaner:
         
         try:
             logger.info("Starting DataFrame cleaning process")
-            # Make a copy to avoid modifying original
-            df = df.copy()
+            # Make a copy to avoid modifying original (shallow: the steps below replace columns rather than write into them)
+            df = df.copy(deep=False)
             
             # Remove empty columns
             original_cols = len(df.columns)
@@ -524,9 +574,10 @@ class DataFrameCleaner:
             df = DataFrameCleaner.remove_empty_rows(df)
             stats['removed_rows'] = original_rows - len(df)
             # pad leading zero to 'เลขประจำตัวผู้เสียภาษี' column that have less than 13 digits
-            df['เลขประจำตัวผู้เสียภาษี'] = df['เลขประจำตัวผู้เสียภาษี'].astype(str)
-            df['เลขประจำตัวผู้เสียภาษี'] = df['เลขประจำตัวผู้เสียภาษี'].apply(lambda x: x.zfill(13) if len(x) < 13 else x)
-            logger.debug(f"df after removing empty rows/columns and padd leading zero: \n{df.head(5)}")
+            # zfill leaves values that already have 13 or more characters unchanged, so no length check is needed
+            df['เลขประจำตัวผู้เสียภาษี'] = df['เลขประจำตัวผู้เสียภาษี'].astype(str).str.zfill(13)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"df after removing empty rows/columns and padd leading zero: \n{df.head(5)}")
 
             # Convert numeric columns
             df = DataFrameCleaner.convert_numeric_columns(df)
@@ -542,7 +593,7 @@ class DataFrameCleaner:
                 raise ValueError("No date columns found for conversion")
 
             for col in date_columns:
-                df[col] = df[col].astype(str).apply(DataFrameCleaner._convert_thai_date)
+                df[col] = DataFrameCleaner._convert_thai_date_series(df[col])
                 df[col] = pd.to_datetime(df[col])
                 logger.info(f"Converted column '{col}' to datetime")    
 
@@ -578,8 +629,8 @@ class DataFrameCleaner:
         
         try:
             logger.info("Starting DataFrame cleaning process")
-            # Make a copy to avoid modifying original
-            df = df.copy()
+            # Make a copy to avoid modifying original (shallow: the steps below replace columns rather than write into them)
+            df = df.copy(deep=False)
             
             # Remove empty columns
             original_cols = len(df.columns)
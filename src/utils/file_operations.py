@@ -1,8 +1,11 @@
 # src\utils\file_operations.py
 import pandas as pd
+import openpyxl
 import os
-from re import match
-from io import StringIO
+import re
+import mmap
+import logging
+from io import BytesIO, StringIO
 from pathlib import Path
 from typing import List, Optional
 
@@ -10,6 +13,10 @@ from utils import get_logger
 
 logger = get_logger()
 
+# Express report data lines start with a quoted, space-padded sequence number, e.g. '"    1",'.
+# Matched against the raw bytes of the whole file, so whitespace must not run across line breaks
+EXPRESS_DATA_LINE_PATTERN = re.compile(rb'(?m)^[^\S\n]*"[^\S\n]+\d+",[^\n]*\n?')
+
 class FileManager:
     """Handles file operations for saving/loading data"""
     
@@ -22,8 +29,11 @@ class FileManager:
             file_path: Path to file
         """
         try:
-            directory = os.path.dirname(os.path.abspath(file_path))
-            os.makedirs(directory, exist_ok=True)
+            # makedirs resolves relative paths itself; a bare file name lives in the current directory
+            directory = os.path.dirname(file_path) or '.'
+            # One stat when the directory is already there (the usual case) instead of makedirs' mkdir attempt
+            if not os.path.isdir(directory):
+                os.makedirs(directory, exist_ok=True)
             logger.debug(f"Ensured directory exists: {directory}")
         except PermissionError as e:
             logger.error(f"Permission denied when creating directory: {directory}. Error: {e}")
@@ -47,13 +57,8 @@ class FileManager:
             bool: True if file exists, False otherwise
         """
         try:
-            directory = os.path.dirname(file_path)
-            if os.path.isdir(directory):
-                # logger.debug(f"Directory contents: {os.listdir(directory)}")
-                pass
-            file_exists = Path(file_path).exists()
-            if file_exists:
-                logger.debug(f"File exists in directory: {directory}")
+            # A single stat call; a directory at this path is not a file that can be loaded
+            file_exists = os.path.isfile(file_path)
             if file_exists:
                 logger.debug(f"File exists: {file_path}")
             else:
@@ -107,41 +112,56 @@ class FileManager:
         try:
             FileManager.ensure_directory_exists(file_path)
 
-            buffer = StringIO()
-            df.info(buf=buffer)
-            info_str = buffer.getvalue()
-            logger.debug(f"Dataframe info:\n{info_str}")
+            if logger.isEnabledFor(logging.DEBUG):
+                buffer = StringIO()
+                df.info(buf=buffer)
+                info_str = buffer.getvalue()
+                logger.debug(f"Dataframe info:\n{info_str}")
 
-            df = df.copy()  # Work on a copy to avoid modifying original
+            # Formatted columns replace the originals in this shallow copy only, so the data is not duplicated
+            df = df.copy(deep=False)
+            # The CSV writer formats floats and date-only columns itself (float_format/date_format)
+            is_csv = Path(file_path).suffix == '.csv'
         
-            # Store original column types
-            original_types = df.dtypes.to_dict()
+            # Group the columns by their original types once (categoricals hold the same strings as object columns)
+            datetime_columns = df.select_dtypes(include=['datetime']).columns.tolist()
+            float_columns = df.select_dtypes(include=['float']).columns.tolist()
+            object_columns = [column for column, dtype in df.dtypes.items()
+                              if dtype == 'object' or isinstance(dtype, pd.CategoricalDtype)]
+            logger.debug(f"Formatting {len(datetime_columns)} datetime, {len(float_columns)} float, "
+                         f"{len(object_columns)} object columns: {datetime_columns}, {float_columns}, {object_columns}")
             
-            # Format datetime columns
-            for column in df.select_dtypes(include=['datetime']):
-                logger.info(f"Formatting datetime column: {column}")
-                df[column] = df[column].apply(lambda x: x.strftime('%y-%m-%d %H:%M') 
-                    if pd.notna(x) and x.time() != pd.Timestamp('00:00').time() 
-                    else x.strftime('%y-%m-%d'))
+            # Format datetime columns: yy-mm-dd, plus HH:MM for values that are not exactly midnight (NaT stays empty)
+            for column in datetime_columns:
+                values = df[column]
+                has_time = values != values.dt.normalize()
+                if is_csv and not has_time.any():
+                    continue
+                df[column] = values.dt.strftime('%y-%m-%d').mask(has_time, values.dt.strftime('%y-%m-%d %H:%M'))
 
             # Format float columns
-            for column in df.select_dtypes(include=['float']):
-                logger.info(f"Formatting float column: {column}")
-                df[column] = df[column].apply(lambda x: f'{x:.2f}' if pd.notna(x) else '')
+            if not is_csv:
+                for column in float_columns:
+                    df[column] = df[column].map('{:.2f}'.format, na_action='ignore').fillna('')
 
-            # Format only original object columns
-            for column, dtype in original_types.items():
-                if dtype == 'object':
-                    logger.info(f"Formatting object column: {column}")
-                    df[column] = (df[column].astype(str)
-                                .str.replace(r'\s+', ' ', regex=True)
-                                .str.strip()
-                                .apply(lambda x: f"'{x}" if pd.notna(x) and len(str(x)) > 0 else x))
+            # Format object columns: collapse whitespace runs, strip, and prefix non-empty values with "'"
+            for column in object_columns:
+                # str.split() splits on the same whitespace as the regex \s, so this equals replace(r'\s+', ' ') + strip()
+                text = pd.Series([' '.join(value.split()) for value in df[column].astype(str)],
+                                 index=df.index, dtype=object)
+                df[column] = text.mask(text.str.len() > 0, "'" + text)
 
             if Path(file_path).suffix == '.csv':
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
+                df.to_csv(file_path, index=False, encoding='utf-8-sig', date_format='%y-%m-%d', float_format='%.2f')
             elif Path(file_path).suffix == '.xlsx':
-                df.to_excel(file_path, index=False, encoding='utf-8-sig', engine='xlsxwriter')
+                # openpyxl write-only mode streams the rows to the file instead of building the whole sheet in memory;
+                # missing values become empty cells, as with to_excel
+                workbook = openpyxl.Workbook(write_only=True)
+                sheet = workbook.create_sheet()
+                sheet.append(df.columns.tolist())
+                for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+                    sheet.append(row)
+                workbook.save(file_path)
                 
             logger.info(f"Saved DataFrame to {file_path}")
             logger.debug(f"{'='*50}")
@@ -179,8 +199,11 @@ class FileManager:
                 
             logger.info(f"Attempting to load standard CSV from {file_path}")
             df = pd.read_csv(file_path, encoding=encoding, dtype=str)
-            df.info()
-            logger.debug(f"loaded dataframe:\n{df.head(20)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                buffer = StringIO()
+                df.info(buf=buffer) # Into the log rather than straight to stdout
+                logger.debug(f"Dataframe info:\n{buffer.getvalue()}")
+                logger.debug(f"loaded dataframe:\n{df.head(20)}")
             return df
         except UnicodeDecodeError as e:
             logger.warning(f"Unicode decode error. Try a different encoding. Error: {e}")
@@ -232,35 +255,34 @@ class FileManager:
             DataFrame containing the processed report data
         """
         try:
-            if not FileManager.ensure_file_exists(file_path):
-                error_msg = f"Express format CSV file not found: {file_path}"
-                logger.error(error_msg)
-                raise FileNotFoundError(error_msg)
-                
+            # Only reached from load_csv_to_dataframe, which has already checked that the file exists;
+            # a missing file still surfaces as FileNotFoundError from open() below
             logger.info(f"Loading Express format CSV from {file_path}")
             
-            # Read raw file content
-            raw_lines = FileManager._load_raw_csv(file_path, encoding)
-            
-            # Filter lines that start with a number sequence (may have spaces before)
-            filtered_lines = [line for line in raw_lines if match(r'^\s*"\s+\d+",', line)]
+            # Filter lines that start with a number sequence (may have spaces before) in a single regex sweep over
+            # the memory-mapped file; Express encodings are ASCII-compatible, so the bytes are matched undecoded and
+            # pandas decodes them while parsing
             display_items = 20
-            logger.debug(f"Filtered {len(filtered_lines)} valid data lines")
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    filtered_lines = []  # mmap cannot map an empty file
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        filtered_lines = EXPRESS_DATA_LINE_PATTERN.findall(mm)
+            filtered_count = len(filtered_lines)
+            logger.debug(f"Filtered {filtered_count} valid data lines")
             
-            if not filtered_lines:
+            if not filtered_count:
                 error_msg = f"No valid data lines found in Express format file"
                 logger.error(error_msg)
                 raise ValueError(error_msg)
                 
-            filtered_sample = '\n'.join(filtered_lines[:display_items])
-            logger.debug(f"Filtered lines: \n{filtered_sample}\n ...{display_items}/{len(filtered_lines)}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                filtered_sample = '\n'.join(line.decode(encoding, errors='replace') for line in filtered_lines[:display_items])
+                logger.debug(f"Filtered lines: \n{filtered_sample}\n ...{display_items}/{filtered_count}...")
             
             # Convert to DataFrame
-            csv_buffer = StringIO("".join(filtered_lines))
-            csv_sample = csv_buffer.getvalue()[:500]
-            logger.debug(f"CSV data sample: \n{csv_sample}...remaining{len(csv_buffer.getvalue())-500} characters...")
-            
-            express_df = pd.read_csv(csv_buffer, header=None, dtype=str)
+            express_df = pd.read_csv(BytesIO(b''.join(filtered_lines)), header=None, dtype=str, encoding=encoding)
             logger.debug(f"Express format data loaded: {express_df.shape[0]} rows, {express_df.shape[1]} columns")
             
             return express_df
@@ -283,44 +305,6 @@ class FileManager:
             logger.error(f"Failed to load Express format CSV: {str(e)}")
             raise
 
-    @staticmethod
-    def _load_raw_csv(file_path:str, encoding:str = "utf-8") -> List[str]:
-        """
-        Load raw CSV file and return lines
-        
-        Args:
-            file_path: Path to CSV file
-            encoding: File encoding
-            
-        Returns:
-            List of strings, each representing a line in the CSV
-        """
-        try:
-            # Read raw file content
-            with open(file_path, encoding=encoding) as f:
-                raw_lines = f.readlines()
-            
-            display_items = 15
-            logger.debug(f"Loaded {len(raw_lines)} lines from csv file")
-            raw_sample = '\n'.join(raw_lines[:display_items])
-            logger.debug(f"RAW lines sample: \n{raw_sample}\n...display {display_items}/{len(raw_lines)}...")
-            return raw_lines
-        except FileNotFoundError as e:
-            logger.error(f"Raw CSV file not found: {file_path}. Error: {e}")
-            raise
-        except PermissionError as e:
-            logger.error(f"Permission denied when reading raw CSV: {file_path}. Error: {e}")
-            raise
-        except UnicodeDecodeError as e:
-            logger.error(f"Unicode decode error when reading raw CSV: {file_path}. Try a different encoding. Error: {e}")
-            raise
-        except IOError as e:
-            logger.error(f"IO error when reading raw CSV: {file_path}. Error: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"csv loading error: {e}")
-            raise
-    
     @staticmethod
     def load_excel_to_dataframe(file_path: str, sheet_name: str) -> pd.DataFrame:
         """
@@ -346,15 +330,19 @@ class FileManager:
                 if pd.notna(x) else x
             }
             
+            # calamine (Rust) parses the workbook much faster than openpyxl and also reads .xls; converters still apply
             df = pd.read_excel(
                 file_path,
                 sheet_name=sheet_name,
-                engine="openpyxl",
+                engine="calamine",
                 dtype=str,  # Convert all columns to string
                 converters=converters  # Apply custom converter to tax ID
             )
-            df.info()
-            logger.debug(f"loaded excel: \n{df.head(5)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                buffer = StringIO()
+                df.info(buf=buffer)
+                logger.debug(f"Dataframe info:\n{buffer.getvalue()}")
+                logger.debug(f"loaded excel: \n{df.head(5)}")
             return df
         except FileNotFoundError as e:
             logger.error(f"Excel file not found: {file_path}. Error: {e}")
@@ -385,7 +373,7 @@ class FileManager:
         """
         try:
             # Load the Excel file
-            excel_file = pd.ExcelFile(file_path)
+            excel_file = pd.ExcelFile(file_path, engine="calamine")
 
             # Get the list of sheet names
             sheet_names = excel_file.sheet_names
@@ -417,11 +405,14 @@ class FileManager:
         """
         try:
             FileManager.ensure_directory_exists(file_path)
+            # One string per page, handed to the file in a single writelines call
+            separator = '=' * 50
+            pages = [
+                f"\n{separator}\nPage {page_num}\n{separator}\n\n{text[:500]}...\n...(remaining {len(text[500:])} characters)...\n"
+                for page_num, text in enumerate(pages_text, 1)
+            ]
             with open(file_path, 'w', encoding=encoding) as f:
-                for page_num, text in enumerate(pages_text, 1):
-                    f.write(f"\n{'='*50}\nPage {page_num}\n{'='*50}\n\n")
-                    f.write(f"{text[:500]}...")
-                    f.write(f"\n...(remaining {len(text[500:])} characters)...\n")
+                f.writelines(pages)
             logger.info(f"Saved OCR results to {file_path}")
         except PermissionError as e:
             logger.error(f"Permission denied when saving OCR results to {file_path}. Error: {e}")
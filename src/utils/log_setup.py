@@ -1,7 +1,10 @@
 # src\utils\log_setup.py
 import os
 import sys
+import atexit
 import logging
+import logging.handlers
+import queue
 import uuid
 from datetime import datetime
 from typing import Optional
@@ -10,15 +13,18 @@ from typing import Optional
 DEFAULT_LOG_DIR = './data/logs'
 DEFAULT_LOG_LEVEL = 'DEBUG'
 DEFAULT_MODULE_NAME = 'main'
+FILE_LOG_BUFFER_CAPACITY = 1024 # Records held in memory before the log file is written
+MAX_LOG_MESSAGE_LENGTH = 10000
 
-class TruncateFilter(logging.Filter):
+class TruncateFormatter(logging.Formatter):
     """
-    Custom logging filter to truncate extremely long messages
+    Custom logging formatter to truncate extremely long messages
     """
-    def filter(self, record):
-        if isinstance(record.msg, str) and len(record.msg) > 10000:
-            record.msg = record.msg[:10000] + "... [truncated]"
-        return True
+    def formatMessage(self, record):
+        # record.message is the rendered text for this format call; record.msg is left untouched
+        if len(record.message) > MAX_LOG_MESSAGE_LENGTH:
+            record.message = record.message[:MAX_LOG_MESSAGE_LENGTH] + "... [truncated]"
+        return super().formatMessage(record)
 
 class LoggerManager:
     """
@@ -28,6 +34,7 @@ class LoggerManager:
     _logger = None
     _run_id = None
     _initialized = False
+    _file_listener = None
     
     @classmethod
     def initialize(cls, 
@@ -90,8 +97,9 @@ class LoggerManager:
             raise RuntimeError("Logger not initialized. Call LoggerManager.initialize() first.")
         return cls._run_id
     
-    @staticmethod
+    @classmethod
     def _setup_logging(
+        cls,
         log_dir: str,
         log_level: str, 
         module: str,
@@ -119,8 +127,8 @@ class LoggerManager:
             f'invoice_matcher_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
         )
 
-        # Formatter with run ID
-        formatter = logging.Formatter(
+        # Formatter with run ID, truncating extremely long messages
+        formatter = TruncateFormatter(
             f'%(process)d-%(thread)d [%(asctime)s.%(msecs)03d] [run:{run_id}] [%(module)s/%(funcName)s:%(lineno)d] %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
@@ -129,22 +137,25 @@ class LoggerManager:
         logger = logging.getLogger(module)
         logger.setLevel(log_level)
         
-        # Remove existing handlers if any
+        # Remove existing handlers if any, writing out what the previous file listener still holds
         if logger.hasHandlers():
             logger.handlers.clear()
+        cls._stop_file_listener()
 
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setFormatter(formatter)
         logger.addHandler(console_handler)
         
-        # File handler
+        # File handler: records are queued and written by a background listener in batches, so logging calls
+        # do not wait on file writes; errors and shutdown flush the batch immediately
         file_handler = logging.FileHandler(log_filename, encoding='utf-8', mode='a')
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-        
-        # Add custom filter
-        logger.addFilter(TruncateFilter())
+        buffered_file_handler = logging.handlers.MemoryHandler(FILE_LOG_BUFFER_CAPACITY, target=file_handler)
+        log_queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        cls._file_listener = logging.handlers.QueueListener(log_queue, buffered_file_handler)
+        cls._file_listener.start()
         
         # Redirect stdout/stderr to UTF-8
         try:
@@ -158,6 +169,22 @@ class LoggerManager:
         
         return logger
 
+    @classmethod
+    def _stop_file_listener(cls) -> None:
+        """
+        Stop the background file log listener, writing out the queued and buffered records and closing the file
+        """
+        if cls._file_listener is None:
+            return
+        cls._file_listener.stop()
+        for buffered_handler in cls._file_listener.handlers:
+            file_handler = buffered_handler.target
+            buffered_handler.close() # Flushes the buffer into the file handler
+            file_handler.close()
+        cls._file_listener = None
+
+atexit.register(LoggerManager._stop_file_listener)
+
 # Simple API for external modules
 def initialize_logging(**kwargs) -> None:
     """
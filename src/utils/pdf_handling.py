@@ -1,4 +1,5 @@
 import fitz  # from PyNuPDF
+from functools import cached_property
 from pathlib import Path
 
 from .log_setup import get_logger
@@ -19,7 +20,17 @@ class PDFValidator:
         self.pdf_path = self.validate_path(pdf_path)
         self.password = password
         self._document = None  # Use private attribute for document
-        self.page_count = self.get_page_count()
+        self._extractable = None  # Cached is_extractable() result
+    
+    @cached_property
+    def page_count(self) -> int:
+        """
+        Total number of pages, read when first needed so that creating a validator does not open the PDF
+        
+        Returns:
+            Number of pages in PDF
+        """
+        return self.get_page_count()
     
     @property
     def document(self):
@@ -120,6 +131,10 @@ class PDFValidator:
         Returns:
             Boolean indicating if text is directly extractable
         """
+        # The document does not change, so the sampled pages are only extracted once
+        if self._extractable is not None:
+            return self._extractable
+
         logger.info(f"Checking if text is directly extractable from PDF: {self.pdf_path}")
         
         # Ensure document is open
@@ -137,10 +152,24 @@ class PDFValidator:
                 break
         
         logger.info(f"PDF text extractability check: {'extractable' if extractable else 'not extractable'}")
+        self._extractable = extractable
         return extractable
     
+    def close(self) -> None:
+        """Close the PDF document if it is open"""
+        if getattr(self, '_document', None) is not None:
+            if not self._document.is_closed:
+                self._document.close()
+            self._document = None
+
+    def __enter__(self) -> "PDFValidator":
+        """Open the document for a with block; it is closed again when the block exits"""
+        self.document  # Opens the document if it is not open yet
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def __del__(self):
         """Cleanup method to ensure document is closed"""
-        if hasattr(self, '_document') and self._document is not None:
-            self._document.close()
-            self._document = None
\ No newline at end of file
+        self.close()
@@ -1,65 +1,263 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import os
 import sys
+import shutil
+import hashlib
+import time
+import threading
+from contextlib import contextmanager
 from packaging import version
 from pathlib import Path
-from tkinter import messagebox
-import winreg
-import subprocess
+import ctypes
 from utils import get_logger
 
 logger = get_logger()
 
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+# (connect, read) timeouts in seconds; a stalled connection fails instead of hanging the update
+CHECK_TIMEOUT = (3, 5)
+DOWNLOAD_TIMEOUT = (5, 30)
+# How long download_update waits for another instance that is downloading the same installer
+DOWNLOAD_LOCK_TIMEOUT = 120
+DOWNLOAD_LOCK_POLL_INTERVAL = 0.5
+UPDATE_POLL_TTL = 6 * 60 * 60 # Seconds after a successful check during which GitHub is not asked again
+UPDATE_DIR = Path(os.environ.get('LOCALAPPDATA') or os.path.expanduser('~/AppData/Local')) / "Matchio" / "Updates"
+
+@contextmanager
+def _exclusive_file_lock(lock_path, timeout=DOWNLOAD_LOCK_TIMEOUT):
+    """
+    Hold an exclusive lock on lock_path, polling every DOWNLOAD_LOCK_POLL_INTERVAL seconds while another
+    process holds it
+
+    Raises:
+        TimeoutError: If the lock is still held by another process after timeout seconds
+    """
+    with open(lock_path, 'w') as lock_file:
+        if sys.platform == 'win32':
+            import msvcrt
+            # LK_LOCK gives up after 10 one-second retries, so poll with the non-blocking mode instead
+            lock = lambda: msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+            unlock = lambda: msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            lock = lambda: fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            unlock = lambda: fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                lock()
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out after {timeout}s waiting for lock: {lock_path}")
+                time.sleep(DOWNLOAD_LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            lock_file.seek(0)
+            unlock()
+
 class Updater:
+    _update_dir_created = False
+
     def __init__(self, current_version, repo_owner, repo_name):
         self.current_version = current_version
         self.repo_owner = repo_owner
         self.repo_name = repo_name
         self.github_api_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/releases/latest"
-        self.update_dir = Path(os.getenv('LOCALAPPDATA')) / "Matchio" / "Updates"
-        self.update_dir.mkdir(parents=True, exist_ok=True)
+        self.update_dir = UPDATE_DIR
+        if not Updater._update_dir_created:
+            self.update_dir.mkdir(parents=True, exist_ok=True)
+            Updater._update_dir_created = True
+        # Fields used from the last release response and its validators, so unchanged releases are answered
+        # with a bodiless 304
+        self.release_meta_file = self.update_dir / "latest.meta.json"
+        # Touched after each successful check; its mtime rate-limits polling to once per poll_ttl_seconds
+        self.last_checked_file = self.update_dir / "last_checked"
+        self.poll_ttl_seconds = UPDATE_POLL_TTL
+        
+        # One session for the release check and the download, so the keep-alive connection is reused between them
+        self._session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        self._session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retries))
+        self._session.headers.update({'User-Agent': f"Matchio-Updater/{current_version}"})
 
     def check_for_updates(self):
         """Check if a new version is available"""
         try:
-            response = requests.get(self.github_api_url, timeout=5)
-            response.raise_for_status()
+            release = self._load_release_cache()
+            if release is not None and self._checked_recently():
+                logger.debug("Checked for updates recently, using cached release data")
+                return self._get_update_info(release)
             
-            latest_release = response.json()
-            latest_version = latest_release['tag_name'].lstrip('v')
+            headers = {'Accept': 'application/vnd.github+json', **self._get_conditional_headers(release)}
+            response = self._session.get(self.github_api_url, headers=headers, timeout=CHECK_TIMEOUT)
             
-            if version.parse(latest_version) > version.parse(self.current_version):
-                return {
-                    'version': latest_version,
-                    'url': self._get_windows_asset_url(latest_release['assets']),
-                    'notes': latest_release['body']
+            if response.status_code == 304 and release is not None:
+                logger.debug("Latest release not modified, using cached release data")
+            else:
+                response.raise_for_status()
+                latest_release = response.json()
+                url, size, sha256 = self._get_windows_asset(latest_release['assets'])
+                release = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'release_id': latest_release.get('id'),
+                    'tag_name': latest_release['tag_name'],
+                    'body': latest_release['body'],
+                    'exe_url': url,
+                    'exe_size': size,
+                    'exe_sha256': sha256
                 }
-            return None
+                self._save_release_cache(release)
+            try:
+                self.last_checked_file.touch()
+            except OSError as e:
+                logger.warning(f"Could not record update check time: {e}")
+            return self._get_update_info(release)
             
         except Exception as e:
             logger.error(f"Error checking for updates: {e}")
             return None
 
-    def _get_windows_asset_url(self, assets):
-        """Get download URL for Windows executable"""
-        for asset in assets:
-            if asset['name'].endswith('.exe'):
-                return asset['browser_download_url']
+    def async_check_for_updates(self, on_done, root=None):
+        """
+        Check for updates in a background thread and pass the check_for_updates result to on_done
+
+        Args:
+            on_done: Callback receiving the update info dict, or None
+            root: Optional Tk widget; when given, on_done is scheduled on the Tk main loop with root.after
+        """
+        def _run():
+            try:
+                update_info = self.check_for_updates()
+            except Exception as e:
+                logger.error(f"Error checking for updates: {e}")
+                update_info = None
+            if root is not None:
+                root.after(0, lambda: on_done(update_info))
+            else:
+                on_done(update_info)
+
+        # A daemon thread, so closing the window never waits for a slow or retrying check to finish
+        threading.Thread(target=_run, name='updater', daemon=True).start()
+
+    def _get_update_info(self, release):
+        """Build the update info for a cached release, or None when it is not newer than the running version"""
+        latest_version = release['tag_name'].lstrip('v')
+        if version.parse(latest_version) > version.parse(self.current_version):
+            return {
+                'version': latest_version,
+                'url': release['exe_url'],
+                'size': release['exe_size'],
+                'sha256': release['exe_sha256'],
+                'notes': release['body']
+            }
         return None
 
-    def download_update(self, url, version):
-        """Download the update file"""
+    def _checked_recently(self):
+        """Whether the last successful check is younger than poll_ttl_seconds"""
+        try:
+            return time.time() - self.last_checked_file.stat().st_mtime < self.poll_ttl_seconds
+        except OSError:
+            return False
+
+    def _load_release_cache(self):
+        """Load the cached release fields, or None when there is no usable cache"""
+        if not self.release_meta_file.exists():
+            return None
+        try:
+            release = json.loads(self.release_meta_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable release cache: {e}")
+            return None
+        return release if 'tag_name' in release and 'exe_url' in release else None
+
+    def _get_conditional_headers(self, release):
+        """Build If-None-Match / If-Modified-Since headers from the cached release response"""
+        if release is None:
+            return {}
+        headers = {}
+        if release.get('etag'):
+            headers['If-None-Match'] = release['etag']
+        if release.get('last_modified'):
+            headers['If-Modified-Since'] = release['last_modified']
+        return headers
+
+    def _save_release_cache(self, release):
+        """Store the release fields together with the response's ETag / Last-Modified validators"""
         try:
-            response = requests.get(url, stream=True)
-            response.raise_for_status()
+            self.release_meta_file.write_text(json.dumps(release), encoding='utf-8')
+        except OSError as e:
+            logger.warning(f"Could not cache release data: {e}")
+
+    def _get_windows_asset(self, assets):
+        """
+        Get download URL, size and SHA-256 of the Windows executable
+
+        Returns:
+            Tuple of (url, size, sha256); sha256 is None when GitHub reports no digest for the asset
+        """
+        asset = next((asset for asset in assets if asset['name'].endswith('.exe')), None)
+        if asset is None:
+            return None, None, None
+        digest = asset.get('digest') or ''
+        sha256 = digest.split(':', 1)[1].lower() if digest.startswith('sha256:') else None
+        return asset['browser_download_url'], asset.get('size'), sha256
+
+    def _is_valid_download(self, update_file, expected_size, expected_sha256):
+        """Check a downloaded installer against the size and SHA-256 published for the release asset"""
+        if expected_size is not None and update_file.stat().st_size != expected_size:
+            return False
+        if expected_sha256 is not None:
+            sha256 = hashlib.sha256()
+            with open(update_file, 'rb') as f:
+                while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                    sha256.update(chunk)
+            return sha256.hexdigest() == expected_sha256
+        return True
+
+    def download_update(self, url, version, expected_size=None, expected_sha256=None):
+        """
+        Download the update file, reusing an earlier download that matches the expected size and SHA-256.
+        The download is written to a .part file and only renamed to the final name once complete and verified,
+        so an existing Matchio-{version}.exe is never a partial download.
+        While another instance downloads the same version this waits up to DOWNLOAD_LOCK_TIMEOUT seconds for it.
+        """
+        update_file = self.update_dir / f"Matchio-{version}.exe"
+        part_file = update_file.with_suffix('.exe.part')
+        try:
+            # Another Matchio instance downloading the same version holds this lock; waiting for it lets this call
+            # reuse that verified download instead of fetching the installer a second time
+            with _exclusive_file_lock(update_file.with_suffix('.lock')):
+                try:
+                    if expected_size is not None and update_file.is_file() \
+                            and self._is_valid_download(update_file, expected_size, expected_sha256):
+                        logger.info(f"Update already downloaded: {update_file}")
+                        return update_file
+            
+                    # The installer is already compressed, so ask for it as-is rather than gzip-encoded again
+                    response = self._session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT,
+                                                 headers={'Accept-Encoding': 'identity'})
+                    response.raise_for_status()
             
-            update_file = self.update_dir / f"Matchio-{version}.exe"
-            with open(update_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                    # Copy the raw stream in 1 MiB blocks; decode_content keeps any Content-Encoding handled as iter_content did
+                    response.raw.decode_content = True
+                    with open(part_file, 'wb') as f:
+                        shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+            
+                    if not self._is_valid_download(part_file, expected_size, expected_sha256):
+                        raise ValueError(f"Downloaded update does not match the published size/SHA-256: {url}")
+                    os.replace(part_file, update_file)
                     
-            return update_file
+                    return update_file
+                except Exception:
+                    part_file.unlink(missing_ok=True)
+                    raise
             
         except Exception as e:
             logger.error(f"Error downloading update: {e}")
@@ -68,11 +266,23 @@ class Updater:
     def install_update(self, update_file):
         """Install the update"""
         try:
-            # Run the new installer with admin privileges
-            subprocess.run(['runas', '/user:Administrator', str(update_file)], 
-                         check=True, capture_output=True)
+            # Run the new installer elevated through the standard UAC consent prompt
+            result = ctypes.windll.shell32.ShellExecuteW(None, 'runas', str(update_file), None, None, 1)
+            if result <= 32:  # ShellExecuteW returns a value above 32 on success
+                raise OSError(f"ShellExecuteW failed with code {result}")
             return True
             
         except Exception as e:
             logger.error(f"Error installing update: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        session = getattr(self, '_session', None)
+        if session is not None:
+            session.close()
+            self._session = None
+
+    def __del__(self):
+        """Cleanup method to ensure the HTTP session is closed"""
+        self.close()